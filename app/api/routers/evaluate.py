@@ -1,10 +1,12 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.api.schemas.jobs import EvaluateRequest
-from app.persistence.db import get_db
-from app.persistence.repo import create_job
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.api.schemas.jobs import EvaluateRequest, EvaluateBatchRequest
+from app.persistence.db import get_async_db
+from app.persistence.async_repo import create_job, create_batch, get_batch_progress, get_files_by_ids
 from app.persistence.models import File
-from app.workers.celery_app import celery_app
+from app.workers.dispatch import enqueue_evaluation, enqueue_evaluations
+from app.config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,22 +14,20 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.post("/evaluate")
-def evaluate(req: EvaluateRequest, db: Session = Depends(get_db)):
+async def evaluate(req: EvaluateRequest, db: AsyncSession = Depends(get_async_db)):
     # Ensure files exist
-    cv = db.get(File, req.cv_id)
-    rp = db.get(File, req.report_id)
+    cv = await db.get(File, req.cv_id)
+    rp = await db.get(File, req.report_id)
     if not cv or not rp:
         raise HTTPException(status_code=404, detail="cv_id or report_id not found")
 
-    job = create_job(db, job_title=req.job_title, cv_file_id=req.cv_id, report_file_id=req.report_id)
+    job = await create_job(db, job_title=req.job_title, cv_file_id=req.cv_id, report_file_id=req.report_id,
+                     force_refresh=req.force_refresh)
 
-    # Enqueue async evaluation using send_task (doesn't require importing the task)
+    # Enqueue async evaluation (Celery task or async worker queue, per WORKER_MODE)
     try:
-        celery_app.send_task(
-            'app.workers.tasks.evaluate_job',
-            args=[job.id],
-            queue='celery'
-        )
+        # Broker publishing is blocking I/O; keep it off the event loop
+        await asyncio.to_thread(enqueue_evaluation, job.id)
         logger.info(f"Job {job.id} queued successfully")
     except Exception as e:
         logger.error(f"Failed to queue job {job.id}: {e}")
@@ -36,4 +36,47 @@ def evaluate(req: EvaluateRequest, db: Session = Depends(get_db)):
             detail=f"Failed to queue evaluation job. Please ensure Redis and Celery worker are running. Error: {str(e)}"
         )
 
-    return {"id": job.id, "status": "queued"}
\ No newline at end of file
+    return {"id": job.id, "status": "queued"}
+
+@router.post("/evaluate/batch")
+async def evaluate_batch(req: EvaluateBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    if len(req.items) > settings.max_batch_size:
+        raise HTTPException(status_code=413, detail=f"At most {settings.max_batch_size} items per batch")
+
+    # Ensure all files exist with a single query
+    files = await get_files_by_ids(db, [fid for item in req.items for fid in (item.cv_id, item.report_id)])
+    missing = sorted({fid for item in req.items for fid in (item.cv_id, item.report_id) if fid not in files})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"File ids not found: {', '.join(missing)}")
+
+    batch, job_ids = await create_batch(db, req.job_title, [(item.cv_id, item.report_id) for item in req.items],
+                                  force_refresh=req.force_refresh)
+
+    try:
+        await asyncio.to_thread(enqueue_evaluations, job_ids)
+        logger.info(f"Batch {batch.id}: {len(job_ids)} jobs queued successfully")
+    except Exception as e:
+        logger.error(f"Failed to queue batch {batch.id}: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"Failed to queue evaluation jobs. Please ensure Redis and Celery worker are running. Error: {str(e)}"
+        )
+
+    return {"batch_id": batch.id, "job_ids": job_ids, "status": "queued"}
+
+@router.get("/evaluate/batch/{batch_id}")
+async def batch_progress(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    progress = await get_batch_progress(db, batch_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="batch_id not found")
+    batch, counts = progress
+    total = sum(counts.values())
+    finished = counts.get("completed", 0) + counts.get("failed", 0)
+    return {
+        "batch_id": batch.id,
+        "job_title": batch.job_title,
+        "total": total,
+        "counts": counts,
+        "finished": finished,
+        "done": finished == total,
+    }
@@ -0,0 +1,12 @@
+﻿from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.utils.metrics import build_registry
+
+router = APIRouter()
+
+# Queue depth is read from Redis on each scrape
+registry = build_registry(include_queue_depth=True)
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,17 @@
+﻿from fastapi import APIRouter
+from app.api.schemas.jobs import RescoreRequest
+from app.services.rescoring import rescore_jobs
+import asyncio
+
+router = APIRouter()
+
+@router.post("/rescore")
+async def rescore(req: RescoreRequest):
+    """
+    Recompute the scores of completed jobs from the current rubric weights.
+    
+    Uses the per-parameter scores already stored with each result, so no LLM
+    calls are made. Runs in a thread; returns how many jobs were scanned and
+    changed.
+    """
+    return await asyncio.to_thread(rescore_jobs, job_title=req.job_title, dry_run=req.dry_run)
@@ -1,13 +1,169 @@
-﻿from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.persistence.db import get_db
-from app.persistence.repo import get_job
+﻿from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.persistence.db import get_async_db, AsyncSessionLocal
+from app.persistence.async_repo import get_job, get_job_state
+from app.persistence.models import JobStatus
+from app.utils.events import job_channel, stage_event, status_event
+from app.utils.redis_client import get_async_redis
+from app.services.response_cache import get_result_response_async, cache_result_response_async
+from app.services.summary import claim_summary, ensure_summary, summary_missing, write_summary_in_background
+from datetime import datetime
+from typing import Literal
+import json
+import redis
 
 router = APIRouter()
 
+TERMINAL_STATUSES = {JobStatus.completed.value, JobStatus.failed.value}
+
+def _etag(status: str, updated_at: datetime, fields: str | None) -> str:
+    # Every status change and result write bumps updated_at
+    suffix = f"-{fields}" if fields else ""
+    return f'"{status}-{updated_at.timestamp():.6f}{suffix}"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+def _respond(request: Request, body: dict, etag: str) -> Response:
+    # no-cache: clients may store the response but must revalidate it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(body, headers=headers)
+
 @router.get("/result/{job_id}")
-def result(job_id: str, db: Session = Depends(get_db)):
-    job = get_job(db, job_id)
-    if not job:
+async def result(job_id: str, request: Request, background_tasks: BackgroundTasks,
+                 fields: Literal["status"] | None = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Job status and result.
+    
+    Supports conditional requests (`ETag` / `If-None-Match` -> 304), and
+    `?fields=status` returns only id, status and updated_at without loading
+    the result. Completed results are served from a Redis cache. In lazy
+    summary mode the first read of a completed job starts writing its summary
+    (one writer per job, however often the job is polled).
+    """
+    version = None
+    if fields is None:
+        # The version is taken before the database read so a concurrent rewrite is not cached over
+        cached, version = await get_result_response_async(job_id)
+        if cached:
+            body, etag = cached
+            return _respond(request, body, etag)
+
+    state = await get_job_state(db, job_id)
+    if not state:
         return {"id": job_id, "status": "unknown"}
-    return {"id": job.id, "status": job.status.value, "result": job.result_json}
\ No newline at end of file
+    etag = _etag(state.status.value, state.updated_at, fields)
+    if _matches(request, etag):
+        return _respond(request, {}, etag)
+    if fields == "status":
+        body = {"id": state.id, "status": state.status.value, "updated_at": state.updated_at.isoformat()}
+        return _respond(request, body, etag)
+
+    job = await get_job(db, job_id)
+    # Re-derive the ETag from the row actually loaded, it may have changed meanwhile
+    etag = _etag(job.status.value, job.updated_at, None)
+    body = {"id": job.id, "status": job.status.value, "result": job.result_json}
+    if job.status == JobStatus.completed:
+        if settings.final_summary_mode == "lazy" and summary_missing(job.result_json):
+            # The result changes once the summary is stored, so it is not cached yet;
+            # only the reader that claims the marker schedules the LLM call
+            if await claim_summary(job_id):
+                background_tasks.add_task(write_summary_in_background, job_id)
+        else:
+            await cache_result_response_async(job_id, body, etag, version)
+    return _respond(request, body, etag)
+
+@router.post("/result/{job_id}/summary")
+async def result_summary(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Write the LLM summary of a completed job now (if it has none yet) and return it."""
+    state = await get_job_state(db, job_id)
+    if not state:
+        raise HTTPException(status_code=404, detail="job_id not found")
+    if state.status != JobStatus.completed:
+        raise HTTPException(status_code=409, detail=f"Job is {state.status.value}, not completed")
+    try:
+        summary = await ensure_summary(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Could not write summary: {e}")
+    if summary is None:
+        return JSONResponse({"id": job_id, "summary_status": "pending"}, status_code=202)
+    return {"id": job_id, "overall_summary": summary}
+
+async def _snapshot(job_id: str) -> tuple[str, list[dict]] | None:
+    """(status, stage events so far) of a job, or None if it does not exist."""
+    # Own session: the stream outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        job = await get_job(db, job_id, with_stages=True)
+        if not job:
+            return None
+        stages = sorted(job.stages, key=lambda st: st.started_at)
+        return job.status.value, [stage_event(st) for st in stages]
+
+async def _load_result(job_id: str) -> dict | None:
+    async with AsyncSessionLocal() as db:
+        job = await get_job(db, job_id)
+        return job.result_json if job else None
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/result/{job_id}/events")
+async def result_events(job_id: str, request: Request):
+    """
+    Stream job progress as Server-Sent Events.
+    
+    Sends the stages recorded so far and the current status, then relays
+    `stage` and `status` events as the worker publishes them, and finally a
+    `result` event once the job completed or failed. A stage event may be
+    repeated around the initial snapshot; clients should key them by
+    (stage, state).
+    """
+    pubsub = get_async_redis().pubsub()
+    try:
+        # Subscribe before taking the snapshot so no event falls in between
+        await pubsub.subscribe(job_channel(job_id))
+    except redis.RedisError:
+        await pubsub.aclose()
+        raise HTTPException(status_code=503, detail=f"Event stream unavailable, poll /result/{job_id} instead")
+    snapshot = await _snapshot(job_id)
+    if snapshot is None:
+        await pubsub.aclose()
+        raise HTTPException(status_code=404, detail="job_id not found")
+
+    async def stream():
+        status, stages = snapshot
+        try:
+            for event in stages:
+                yield _sse("stage", event)
+            yield _sse("status", status_event(job_id, status))
+            while status not in TERMINAL_STATUSES:
+                if await request.is_disconnected():
+                    return
+                message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                                   timeout=settings.sse_keepalive_seconds)
+                if message is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                event = json.loads(message["data"])
+                yield _sse(event["type"], event)
+                if event["type"] == "status":
+                    status = event["status"]
+            result = await _load_result(job_id)
+            yield _sse("result", {"id": job_id, "status": status, "result": result})
+        finally:
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
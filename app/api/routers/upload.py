@@ -1,29 +1,70 @@
-﻿from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-import os, uuid
-from sqlalchemy.orm import Session
+﻿from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, BackgroundTasks
+import os, uuid, hashlib
+import anyio
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.persistence.db import get_db
-from app.persistence.repo import create_file
+from app.persistence.db import get_async_db
+from app.persistence.async_repo import create_file, get_file_by_sha256
 from app.persistence.models import FileKind
+from app.services.extraction import extract_and_store
 
 router = APIRouter()
 
-async def _save_upload(f: UploadFile) -> str:
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    ext = os.path.splitext(f.filename)[1]
-    fid = f"{uuid.uuid4()}{ext}"
-    path = os.path.join(settings.upload_dir, fid)
-    data = await f.read()
-    with open(path, "wb") as out:
-        out.write(data)
-    return path
+CHUNK_SIZE = 1024 * 1024
+
+def _too_large(f: UploadFile) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{f.filename} exceeds the {settings.max_upload_bytes} byte upload limit",
+    )
+
+async def _save_upload(f: UploadFile) -> tuple[str, str]:
+    """
+    Stream an upload to disk in fixed-size chunks, hashing it on the way.
+    
+    Files are content-addressed (<upload_dir>/<sha[:2]>/<sha><ext>), so an
+    identical file is stored once. Returns (path, sha256).
+    """
+    if f.size is not None and f.size > settings.max_upload_bytes:
+        raise _too_large(f)
+    await anyio.to_thread.run_sync(lambda: os.makedirs(settings.upload_dir, exist_ok=True))
+    ext = os.path.splitext(f.filename)[1].lower()
+    tmp_path = anyio.Path(settings.upload_dir) / f".{uuid.uuid4()}.part"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            while chunk := await f.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.max_upload_bytes:
+                    raise _too_large(f)
+                digest.update(chunk)
+                await out.write(chunk)
+        sha = digest.hexdigest()
+        path = anyio.Path(settings.upload_dir) / sha[:2] / f"{sha}{ext}"
+        if await path.exists():
+            await tmp_path.unlink()
+        else:
+            await path.parent.mkdir(parents=True, exist_ok=True)
+            await tmp_path.rename(path)
+    except BaseException:
+        await tmp_path.unlink(missing_ok=True)
+        raise
+    return str(path), sha
 
 @router.post("/upload")
-async def upload_files(cv: UploadFile = File(...), report: UploadFile = File(...), db: Session = Depends(get_db)):
+async def upload_files(background: BackgroundTasks, cv: UploadFile = File(...), report: UploadFile = File(...),
+                       db: AsyncSession = Depends(get_async_db)):
     if not cv.filename or not report.filename:
         raise HTTPException(status_code=400, detail="Both cv and report are required")
-    cv_path = await _save_upload(cv)
-    rpt_path = await _save_upload(report)
-    cv_rec = create_file(db, FileKind.cv, cv.filename, cv_path)
-    rpt_rec = create_file(db, FileKind.report, report.filename, rpt_path)
+    cv_path, cv_sha = await _save_upload(cv)
+    rpt_path, rpt_sha = await _save_upload(report)
+    # Identical content uploaded before: reuse its File row
+    cv_rec = (await get_file_by_sha256(db, FileKind.cv, cv_sha)
+              or await create_file(db, FileKind.cv, cv.filename, cv_path, sha256=cv_sha))
+    rpt_rec = (await get_file_by_sha256(db, FileKind.report, rpt_sha)
+               or await create_file(db, FileKind.report, report.filename, rpt_path, sha256=rpt_sha))
+    # Parse PDFs off the request path so evaluations start from stored text
+    background.add_task(extract_and_store, cv_rec.id, cv_rec.path, FileKind.cv)
+    background.add_task(extract_and_store, rpt_rec.id, rpt_rec.path, FileKind.report)
     return {"cv_id": cv_rec.id, "report_id": rpt_rec.id}
\ No newline at end of file
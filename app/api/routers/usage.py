@@ -0,0 +1,72 @@
+﻿from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.llm.usage import merge_totals, summarize
+from app.persistence.db import get_async_db
+from app.persistence.async_repo import get_job, get_stage_usage, iter_usage_by_job_title
+from collections import defaultdict
+from datetime import datetime
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}/usage")
+async def job_usage(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """LLM calls made by each stage of a job (tokens, latency, retries) with per-stage and job totals."""
+    job = await get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job_id not found")
+
+    stages, all_calls = [], []
+    for name, started_at, ended_at, cache_hit, model_tier, usage in await get_stage_usage(db, job_id):
+        calls = usage or []
+        all_calls.extend(calls)
+        stages.append({
+            "name": name,
+            "duration_ms": round((ended_at - started_at).total_seconds() * 1000, 1) if ended_at else None,
+            "cache_hit": cache_hit,
+            "model_tier": model_tier,
+            "totals": summarize(calls),
+            "calls": calls,
+        })
+    return {
+        "id": job.id,
+        "job_title": job.job_title,
+        "status": job.status.value,
+        "totals": summarize(all_calls),
+        "stages": stages,
+    }
+
+@router.get("/usage/by-job-title")
+async def usage_by_job_title(job_title: str | None = None, since: datetime | None = None,
+                             db: AsyncSession = Depends(get_async_db)):
+    """
+    LLM usage aggregated per job title, overall and per stage.
+    
+    `job_title` restricts the report to one title and `since` to jobs created
+    after that time; without them every job with recorded usage is scanned.
+    """
+    empty = summarize([])
+    totals: dict[str, dict] = defaultdict(lambda: empty)
+    stage_totals: dict[str, dict[str, dict]] = defaultdict(lambda: defaultdict(lambda: empty))
+    jobs: dict[str, set[str]] = defaultdict(set)
+    # Fold rows into running totals so large scans do not hold every record
+    async for title, job_id, stage, usage in iter_usage_by_job_title(db, job_title, since):
+        row_totals = summarize(usage)
+        jobs[title].add(job_id)
+        totals[title] = merge_totals(totals[title], row_totals)
+        stage_totals[title][stage] = merge_totals(stage_totals[title][stage], row_totals)
+
+    report = []
+    for title in sorted(totals):
+        title_totals, n_jobs = totals[title], len(jobs[title])
+        report.append({
+            "job_title": title,
+            "jobs": n_jobs,
+            "totals": title_totals,
+            "per_job": {
+                "prompt_tokens": round(title_totals["prompt_tokens"] / n_jobs, 1),
+                "completion_tokens": round(title_totals["completion_tokens"] / n_jobs, 1),
+                "latency_ms": round(title_totals["latency_ms"] / n_jobs, 1),
+            },
+            "stages": dict(stage_totals[title]),
+        })
+    return {"job_titles": report}
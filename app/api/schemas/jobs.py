@@ -1,6 +1,23 @@
-﻿from pydantic import BaseModel
+﻿from pydantic import BaseModel, Field
 
 class EvaluateRequest(BaseModel):
     job_title: str
     cv_id: str
     report_id: str
+    # Ignore cached results for identical submissions and evaluate from scratch
+    force_refresh: bool = False
+
+class BatchItem(BaseModel):
+    cv_id: str
+    report_id: str
+
+class EvaluateBatchRequest(BaseModel):
+    job_title: str
+    items: list[BatchItem] = Field(min_length=1)
+    force_refresh: bool = False
+
+class RescoreRequest(BaseModel):
+    # Only rescore jobs for this title (all completed jobs if omitted)
+    job_title: str | None = None
+    # Count the jobs whose scores would change without writing them
+    dry_run: bool = False
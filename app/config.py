@@ -5,18 +5,108 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     redis_url: str = "redis://redis:6379/0"
     database_url: str = "sqlite:///./app.db"
+    # Connection pool for server databases (Postgres); per process
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_recycle_seconds: int = 1800
+    # How long SQLite waits on a locked database before raising
+    sqlite_busy_timeout_ms: int = 5000
     upload_dir: str = "./data/uploads"
+    # Uploads larger than this are rejected with 413 while streaming
+    max_upload_bytes: int = 20 * 1024 * 1024
+    # Processes extracting PDF text in the background after an upload
+    pdf_extract_workers: int = 2
+    # Characters of each document sent to the LLM; PDF pages past the budget are never parsed
+    cv_max_chars: int = 8000
+    report_max_chars: int = 10000
     
     # Additional environment variables
     vector_db: str = "qdrant"
     api_host: str = "0.0.0.0"
     api_port: str = "8000"
 
+    # Qdrant backend: remote server if qdrant_url is set, embedded on-disk store if
+    # qdrant_path is set, otherwise a per-process in-memory store
+    qdrant_url: str | None = None
+    qdrant_api_key: str | None = None
+    qdrant_prefer_grpc: bool = True
+    qdrant_grpc_port: int = 6334
+    qdrant_pool_size: int = 8
+    qdrant_timeout: int = 10
+    qdrant_path: str | None = None
+    # How often a process re-reads the shared corpus version
+    corpus_version_refresh_seconds: float = 30.0
+
     # Optional LLM settings
     openai_api_key: str | None = None
     openai_model: str = "gpt-5-2025-08-07"
     # Temperature for LLM calls (1.0 for o1/o3/gpt-5 models, 0.3-0.7 for gpt-4)
     openai_temperature: float = 1.0
+    # Model cascade: CV and project evaluations run on the fast model first and
+    # are redone with OPENAI_MODEL only when the answer is invalid or its
+    # rubric-weighted score (1-5) lies in the borderline band
+    cascade_enabled: bool = False
+    cascade_fast_model: str = "gpt-4o-mini"
+    cascade_fast_temperature: float = 0.3
+    cascade_borderline_min: float = 2.5
+    cascade_borderline_max: float = 3.5
+    # Shared HTTP pool per process, request timeout, and cap on concurrent async LLM calls
+    llm_max_connections: int = 64
+    llm_timeout_seconds: float = 120.0
+    llm_max_in_flight: int = 32
+
+    # Shared Redis token-bucket limits consulted before every OpenAI call.
+    # Per-model overrides as JSON, e.g. {"gpt-4o-mini": {"rpm": 5000, "tpm": 2000000}}
+    rate_limit_enabled: bool = False
+    openai_rate_limits: dict[str, dict[str, int]] = {}
+    openai_default_rpm: int = 500
+    openai_default_tpm: int = 200_000
+    rate_limit_max_wait_seconds: float = 60.0
+    # Completion tokens assumed per JSON evaluation call when estimating TPM usage
+    llm_expected_completion_tokens: int = 800
+
+    # Embeddings
+    embedding_model: str = "text-embedding-3-small"
+    # Inputs per embeddings request, and an estimated-token cap per request
+    embedding_batch_size: int = 96
+    embedding_batch_max_tokens: int = 100_000
+    # On-disk (model, sha256(text)) -> vector cache shared by all local processes
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./data/cache/embeddings.sqlite3"
+    embedding_cache_max_entries: int = 100_000
+    # In-process LRU of retrieval results, invalidated by corpus version
+    retrieval_cache_max_entries: int = 256
+
+    # Evaluation pipeline
+    # Max (cv_id, report_id) pairs accepted by one /evaluate/batch call
+    max_batch_size: int = 500
+    # Seconds between keepalive comments on /result/{job_id}/events streams
+    sse_keepalive_seconds: int = 15
+    # Completed /result responses are cached in Redis for this long
+    result_cache_ttl_seconds: int = 24 * 3600
+    # Max stages run concurrently per job (CV and project branches are independent)
+    pipeline_max_workers: int = 4
+    # Share of the overall score taken from the CV evaluation (the rest from the project)
+    final_cv_weight: float = 0.3
+    # Narrative summary of the final assessment: "eager" (LLM call in the pipeline),
+    # "lazy" (written in the background on the first /result read) or "off"
+    # (only via POST /result/{job_id}/summary). Scores never need the LLM.
+    final_summary_mode: str = "lazy"
+    # Jobs fetched, rescored and written per chunk by app.services.rescoring
+    rescore_batch_size: int = 2000
+    # Lexical pre-screen of CVs against the job descriptions: CVs scoring below
+    # the threshold (TF-IDF cosine, 0-1) get a templated rejection without LLM
+    # calls. Calibrate with benchmarks/prescreen_harness.py before enabling.
+    prescreen_enabled: bool = False
+    prescreen_threshold: float = 0.05
+
+    # Workers: "celery" (prefork task per job) or "async" (app.workers.async_worker
+    # runs many jobs concurrently on one event loop, fed from a Redis list)
+    worker_mode: str = "celery"
+    async_queue_name: str = "evaluator:jobs"
+    async_worker_concurrency: int = 50
+    # Port of the workers' Prometheus metrics endpoint (the API serves /metrics itself)
+    worker_metrics_port: int = 9100
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,78 @@
+"""
+Two-tier model cascade for the CV and project evaluations.
+
+The fast, cheap model answers first. Its answer is kept unless it is invalid
+(missing or out-of-range parameter scores, unparseable JSON) or its
+rubric-weighted score (1-5) falls in the borderline band
+[`cascade_borderline_min`, `cascade_borderline_max`], where a wrong call is
+most likely to flip the recommendation; those stages are evaluated again
+with the strong model (`settings.openai_model`). Clear accepts and rejects,
+the bulk of a screening batch, never reach the strong model.
+"""
+from __future__ import annotations
+from typing import Awaitable, Callable
+from app.config import settings
+from app.llm.client import LLMClient, AsyncLLMClient
+from app.services.scoring import rubric_weights, weighted_score
+from app.services.stage_graph import Tiered
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+STRONG = "strong"
+
+
+def fast_client(strong: LLMClient | AsyncLLMClient) -> LLMClient | AsyncLLMClient:
+    """Client of the same kind as `strong` for the fast tier."""
+    return type(strong)(model=settings.cascade_fast_model, temperature=settings.cascade_fast_temperature)
+
+
+def escalation_reason(result: dict, rubric: str) -> str | None:
+    """Why a fast-tier answer must be redone by the strong model, or None to keep it."""
+    weights = rubric_weights()[rubric]
+    for param in weights:
+        score = (result.get(param) or {}).get("score")
+        if not isinstance(score, (int, float)) or isinstance(score, bool) or not 1 <= score <= 5:
+            return f"invalid score for {param}: {score!r}"
+    score = weighted_score(result, weights)
+    if settings.cascade_borderline_min <= score <= settings.cascade_borderline_max:
+        return f"borderline score {score:.2f}"
+    return None
+
+
+def cascade(evaluate: Callable[[LLMClient], dict], rubric: str, strong: LLMClient) -> Tiered:
+    """
+    Run `evaluate` with the fast model, escalating to `strong` when needed.
+
+    Args:
+        evaluate: Runs the evaluation with the given client
+        rubric: Rubric the result is scored on ("cv" or "project")
+        strong: Client of the strong tier
+
+    Returns:
+        Tiered result naming the tier that produced it
+    """
+    try:
+        result = evaluate(fast_client(strong))
+        reason = escalation_reason(result, rubric)
+    except Exception as e:
+        reason = f"fast model failed: {e}"
+    if reason is None:
+        return Tiered(result, FAST)
+    logger.info(f"Escalating {rubric} evaluation to {strong.model}: {reason}")
+    return Tiered(evaluate(strong), STRONG, note=reason)
+
+
+async def cascade_async(evaluate: Callable[[AsyncLLMClient], Awaitable[dict]], rubric: str,
+                        strong: AsyncLLMClient) -> Tiered:
+    """Async variant of cascade."""
+    try:
+        result = await evaluate(fast_client(strong))
+        reason = escalation_reason(result, rubric)
+    except Exception as e:
+        reason = f"fast model failed: {e}"
+    if reason is None:
+        return Tiered(result, FAST)
+    logger.info(f"Escalating {rubric} evaluation to {strong.model}: {reason}")
+    return Tiered(await evaluate(strong), STRONG, note=reason)
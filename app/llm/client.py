@@ -1,21 +1,95 @@
 from app.config import settings
-from openai import OpenAI, APIError, APITimeoutError, RateLimitError
+from app.llm import rate_limit
+from app.llm.usage import note_attempt
+from app.utils.metrics import LLMCallTimer, count_llm_retry
+from openai import OpenAI, AsyncOpenAI, APIError, APITimeoutError, RateLimitError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import asyncio
+import httpx
 import json
+import os
 from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# One OpenAI client (and HTTP connection pool) per process, shared by every job
+_sync_client: Optional[OpenAI] = None
+_sync_client_pid: Optional[int] = None
+
+# Async clients and in-flight limiters are bound to the event loop they were created on
+_async_state: Optional[tuple[asyncio.AbstractEventLoop, AsyncOpenAI, asyncio.Semaphore]] = None
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_connections,
+        keepalive_expiry=60,
+    )
+
+
+def get_sync_openai() -> OpenAI:
+    """Get or create the process-wide sync OpenAI client."""
+    global _sync_client, _sync_client_pid
+    if _sync_client is None or _sync_client_pid != os.getpid():
+        _sync_client = OpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.llm_timeout_seconds,
+            http_client=httpx.Client(limits=_http_limits()),
+        )
+        _sync_client_pid = os.getpid()
+    return _sync_client
+
+
+def _get_async_state() -> tuple[AsyncOpenAI, asyncio.Semaphore]:
+    global _async_state
+    loop = asyncio.get_running_loop()
+    if _async_state is None or _async_state[0] is not loop:
+        client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            timeout=settings.llm_timeout_seconds,
+            http_client=httpx.AsyncClient(limits=_http_limits()),
+        )
+        _async_state = (loop, client, asyncio.Semaphore(settings.llm_max_in_flight))
+        logger.info(f"Initialized async OpenAI client (max in flight={settings.llm_max_in_flight})")
+    return _async_state[1], _async_state[2]
+
+
+def _build_messages(prompt: str, system: str) -> list[dict]:
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def _estimate_call_tokens(prompt: str, system: str, completion_tokens: int) -> int:
+    return rate_limit.estimate_tokens(system + prompt) + completion_tokens
+
+
+def _parse_json_content(content: str | None) -> dict:
+    if not content:
+        raise Exception("Empty response from OpenAI")
+    try:
+        result = json.loads(content)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse JSON from LLM response: {e}")
+        raise Exception(f"Invalid JSON response from model: {e}")
+    logger.info(f"Successfully received JSON response with keys: {list(result.keys())}")
+    return result
+
 
 class LLMClient:
-    def __init__(self) -> None:
+    def __init__(self, model: str | None = None, temperature: float | None = None) -> None:
         self.api_key = settings.openai_api_key
-        self.model = settings.openai_model
+        # Defaults to the configured model; the cascade also builds a client for its fast tier
+        self.model = model or settings.openai_model
+        self.temperature = settings.openai_temperature if temperature is None else temperature
         self.enabled = bool(self.api_key)
         self.client: Optional[OpenAI] = None
         if self.enabled:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = get_sync_openai()
 
     def available(self) -> bool:
         return self.enabled
@@ -23,6 +97,8 @@ class LLMClient:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
+        before=note_attempt,
+        before_sleep=count_llm_retry,
         retry=retry_if_exception_type((APITimeoutError, RateLimitError)),
     )
     def eval_json(self, prompt: str, system: str = "", temperature: float | None = None) -> dict:
@@ -33,6 +109,7 @@ class LLMClient:
             prompt: User prompt
             system: System message
             temperature: Controls randomness (0.0-1.0). Lower = more deterministic.
+                Defaults to the client's temperature.
         
         Returns:
             Parsed JSON dict from model response
@@ -43,37 +120,28 @@ class LLMClient:
         if not self.enabled or not self.client:
             raise Exception("LLM client not available. Check OPENAI_API_KEY configuration.")
         
-        # Use configured temperature if not specified
+        # Use the client's temperature if not specified
         if temperature is None:
-            temperature = settings.openai_temperature
+            temperature = self.temperature
         
         try:
+            rate_limit.acquire(
+                self.model, _estimate_call_tokens(prompt, system, settings.llm_expected_completion_tokens)
+            )
             logger.info(f"Calling OpenAI API with model={self.model}, temp={temperature}")
             
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                response_format={"type": "json_object"},
-            )
-            
-            content = response.choices[0].message.content
-            if not content:
-                raise Exception("Empty response from OpenAI")
+            with LLMCallTimer(self.model) as call:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=_build_messages(prompt, system),
+                    temperature=temperature,
+                    response_format={"type": "json_object"},
+                )
+                call.record(response)
             
             # Parse JSON response
-            result = json.loads(content)
-            logger.info(f"Successfully received JSON response with keys: {list(result.keys())}")
-            return result
+            return _parse_json_content(response.choices[0].message.content)
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from LLM response: {e}")
-            raise Exception(f"Invalid JSON response from model: {e}")
         except (APITimeoutError, RateLimitError) as e:
             logger.warning(f"OpenAI API error (will retry): {e}")
             raise
@@ -84,6 +152,8 @@ class LLMClient:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
+        before=note_attempt,
+        before_sleep=count_llm_retry,
         retry=retry_if_exception_type((APIError, APITimeoutError, RateLimitError)),
     )
     def complete(self, prompt: str, system: str = "", temperature: float = 0.5, max_tokens: int = 1000) -> str:
@@ -103,19 +173,17 @@ class LLMClient:
             raise Exception("LLM client not available. Check OPENAI_API_KEY configuration.")
         
         try:
+            rate_limit.acquire(self.model, _estimate_call_tokens(prompt, system, max_tokens))
             logger.info(f"Calling OpenAI API (text) with model={self.model}")
             
-            messages = []
-            if system:
-                messages.append({"role": "system", "content": system})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            )
+            with LLMCallTimer(self.model) as call:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=_build_messages(prompt, system),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+                call.record(response)
             
             content = response.choices[0].message.content
             if not content:
@@ -129,4 +197,100 @@ class LLMClient:
             raise
         except Exception as e:
             logger.error(f"Unexpected error in LLM call: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+class AsyncLLMClient:
+    """
+    Asyncio counterpart of LLMClient.
+    
+    All instances on an event loop share one pooled AsyncOpenAI client, and a
+    semaphore caps in-flight requests at settings.llm_max_in_flight so many
+    concurrent jobs cannot open an unbounded number of connections.
+    """
+
+    def __init__(self, model: str | None = None, temperature: float | None = None) -> None:
+        self.api_key = settings.openai_api_key
+        self.model = model or settings.openai_model
+        self.temperature = settings.openai_temperature if temperature is None else temperature
+        self.enabled = bool(self.api_key)
+
+    def available(self) -> bool:
+        return self.enabled
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before=note_attempt,
+        before_sleep=count_llm_retry,
+        retry=retry_if_exception_type((APITimeoutError, RateLimitError)),
+    )
+    async def eval_json(self, prompt: str, system: str = "", temperature: float | None = None) -> dict:
+        """Return JSON from the model with retry logic (see LLMClient.eval_json)."""
+        if not self.enabled:
+            raise Exception("LLM client not available. Check OPENAI_API_KEY configuration.")
+        
+        if temperature is None:
+            temperature = self.temperature
+        
+        client, in_flight = _get_async_state()
+        try:
+            await rate_limit.acquire_async(
+                self.model, _estimate_call_tokens(prompt, system, settings.llm_expected_completion_tokens)
+            )
+            async with in_flight:
+                logger.info(f"Calling OpenAI API (async) with model={self.model}, temp={temperature}")
+                with LLMCallTimer(self.model) as call:
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=_build_messages(prompt, system),
+                        temperature=temperature,
+                        response_format={"type": "json_object"},
+                    )
+                    call.record(response)
+            return _parse_json_content(response.choices[0].message.content)
+            
+        except (APITimeoutError, RateLimitError) as e:
+            logger.warning(f"OpenAI API error (will retry): {e}")
+            raise
+        except Exception as e:
+            logger.error(f"LLM call failed: {e}")
+            raise
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        before=note_attempt,
+        before_sleep=count_llm_retry,
+        retry=retry_if_exception_type((APIError, APITimeoutError, RateLimitError)),
+    )
+    async def complete(self, prompt: str, system: str = "", temperature: float = 0.5, max_tokens: int = 1000) -> str:
+        """Get a text completion from the model with retry logic (see LLMClient.complete)."""
+        if not self.enabled:
+            raise Exception("LLM client not available. Check OPENAI_API_KEY configuration.")
+        
+        client, in_flight = _get_async_state()
+        try:
+            await rate_limit.acquire_async(self.model, _estimate_call_tokens(prompt, system, max_tokens))
+            async with in_flight:
+                logger.info(f"Calling OpenAI API (async text) with model={self.model}")
+                with LLMCallTimer(self.model) as call:
+                    response = await client.chat.completions.create(
+                        model=self.model,
+                        messages=_build_messages(prompt, system),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                    )
+                    call.record(response)
+            
+            content = response.choices[0].message.content
+            if not content:
+                raise Exception("Empty response from OpenAI")
+            return content.strip()
+            
+        except (APIError, APITimeoutError, RateLimitError) as e:
+            logger.warning(f"OpenAI API error (will retry): {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Unexpected error in LLM call: {e}")
+            raise
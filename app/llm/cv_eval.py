@@ -1,15 +1,81 @@
 """
 CV evaluation using LLM with RAG-enhanced prompts.
 """
-from app.llm.client import LLMClient
+from app.llm.client import LLMClient, AsyncLLMClient
 from app.llm.prompts import CV_EVALUATION_SYSTEM, build_cv_evaluation_prompt
-from app.rag.retrieve import retrieve_context
+from app.rag.retrieve import retrieve_context, get_corpus_version
+from app.utils.redis_client import get_redis
+from app.config import settings
+import asyncio
 import logging
+import redis
 
 logger = logging.getLogger(__name__)
 
+BATCH_CONTEXT_TTL_SECONDS = 24 * 3600
 
-def evaluate_cv(cv_text: str, job_title: str, llm_client: LLMClient) -> dict:
+
+def job_description_context(job_title: str, batch_id: str | None = None) -> str:
+    """
+    Retrieve the job description context for a job title.
+    
+    All jobs of a batch share one title, so the first of them to get here
+    stores the context in Redis and the others (in any worker) reuse it.
+    
+    Args:
+        job_title: Job title for context
+        batch_id: Batch the job belongs to, if any
+    
+    Returns:
+        Concatenated job description chunks
+    """
+    def retrieve() -> str:
+        return retrieve_context(
+            query=f"job description requirements for {job_title}",
+            collection="job_descriptions",
+            top_k=3
+        )
+    
+    if batch_id is None:
+        return retrieve()
+    key = f"batch:{batch_id}:jd_context:{get_corpus_version()}"
+    try:
+        cached = get_redis().get(key)
+        if cached is not None:
+            return cached.decode("utf-8")
+    except redis.RedisError as e:
+        logger.warning(f"Batch context cache unavailable: {e}")
+        return retrieve()
+    
+    context = retrieve()
+    if context:
+        try:
+            get_redis().set(key, context, ex=BATCH_CONTEXT_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"Could not share batch context: {e}")
+    return context
+
+
+def build_cv_prompt(cv_text: str, job_title: str, batch_id: str | None = None) -> str:
+    """Retrieve RAG context for the job title and build the CV evaluation prompt."""
+    # Retrieve relevant context from vector DB
+    job_description = job_description_context(job_title, batch_id)
+    
+    scoring_rubric = retrieve_context(
+        query="CV evaluation scoring rubric parameters",
+        collection="scoring_rubrics",
+        top_k=2
+    )
+    
+    # Build prompt with RAG context
+    return build_cv_evaluation_prompt(
+        cv_text=cv_text[:settings.cv_max_chars],  # Limit to avoid token limits
+        job_description=job_description,
+        scoring_rubric=scoring_rubric
+    )
+
+
+def evaluate_cv(cv_text: str, job_title: str, llm_client: LLMClient, batch_id: str | None = None) -> dict:
     """
     Evaluate a CV against job requirements using LLM.
     
@@ -17,6 +83,7 @@ def evaluate_cv(cv_text: str, job_title: str, llm_client: LLMClient) -> dict:
         cv_text: Extracted text from candidate's CV
         job_title: Job title for context
         llm_client: LLM client instance
+        batch_id: Batch the job belongs to; its job description context is shared
     
     Returns:
         dict with evaluation results including scores and feedback
@@ -26,26 +93,7 @@ def evaluate_cv(cv_text: str, job_title: str, llm_client: LLMClient) -> dict:
     
     try:
         logger.info("Starting CV evaluation with RAG")
-        
-        # Retrieve relevant context from vector DB
-        job_description = retrieve_context(
-            query=f"job description requirements for {job_title}",
-            collection="job_descriptions",
-            top_k=3
-        )
-        
-        scoring_rubric = retrieve_context(
-            query="CV evaluation scoring rubric parameters",
-            collection="scoring_rubrics",
-            top_k=2
-        )
-        
-        # Build prompt with RAG context
-        prompt = build_cv_evaluation_prompt(
-            cv_text=cv_text[:8000],  # Limit to avoid token limits
-            job_description=job_description,
-            scoring_rubric=scoring_rubric
-        )
+        prompt = build_cv_prompt(cv_text, job_title, batch_id)
         
         # Call LLM with structured JSON output (uses configured temperature)
         result = llm_client.eval_json(
@@ -58,4 +106,22 @@ def evaluate_cv(cv_text: str, job_title: str, llm_client: LLMClient) -> dict:
         
     except Exception as e:
         logger.error(f"Error in CV evaluation: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def evaluate_cv_async(cv_text: str, job_title: str, llm_client: AsyncLLMClient,
+                            batch_id: str | None = None) -> dict:
+    """Async variant of evaluate_cv; retrieval runs in a thread, the LLM call on the loop."""
+    if not llm_client.available():
+        raise Exception("LLM client not available for CV evaluation")
+    
+    try:
+        logger.info("Starting CV evaluation with RAG")
+        prompt = await asyncio.to_thread(build_cv_prompt, cv_text, job_title, batch_id)
+        result = await llm_client.eval_json(prompt=prompt, system=CV_EVALUATION_SYSTEM)
+        logger.info(f"CV evaluation completed: match_rate={result.get('cv_match_rate', 0)}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in CV evaluation: {e}")
+        raise
@@ -1,48 +1,88 @@
 """
-Final aggregation of CV and project evaluations using LLM.
+Final aggregation of CV and project evaluations.
+
+The overall score and recommendation are computed deterministically from the
+per-parameter scores and the rubric weights (see app.services.scoring). The
+LLM only writes the narrative summary, either in the pipeline
+(FINAL_SUMMARY_MODE=eager) or later on demand (see app.services.summary).
 """
-from app.llm.client import LLMClient
+from app.config import settings
+from app.llm.client import LLMClient, AsyncLLMClient
 from app.llm.prompts import FINAL_AGGREGATION_SYSTEM, build_final_aggregation_prompt
+from app.services.scoring import compute_final_scores
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def aggregate_results(cv_result: dict, project_result: dict, job_title: str, llm_client: LLMClient) -> dict:
+def aggregate_results(cv_result: dict, project_result: dict) -> dict:
     """
-    Aggregate CV and project evaluation results into final assessment.
+    Aggregate CV and project evaluation results into the final scores.
     
     Args:
         cv_result: CV evaluation results
         project_result: Project evaluation results
+    
+    Returns:
+        dict with overall_score, recommendation, the weighted CV and project
+        scores they were computed from, and overall_summary (None until written)
+    """
+    scores = compute_final_scores(cv_result, project_result, settings.final_cv_weight)
+    logger.info(f"Final aggregation completed: overall_score={scores['overall_score']} "
+                f"({scores['recommendation']})")
+    return {
+        "overall_score": scores["overall_score"],
+        "recommendation": scores["recommendation"],
+        "overall_summary": None,
+        "scoring": {
+            "cv_weighted_score": scores["cv_weighted_score"],
+            "project_weighted_score": scores["project_weighted_score"],
+            "cv_weight": settings.final_cv_weight,
+        },
+    }
+
+
+def write_summary(cv_result: dict, project_result: dict, final: dict, job_title: str,
+                  llm_client: LLMClient) -> str:
+    """
+    Have the LLM write the narrative summary of an aggregated evaluation.
+    
+    Args:
+        cv_result: CV evaluation results
+        project_result: Project evaluation results
+        final: Output of aggregate_results
         job_title: Job title for context
         llm_client: LLM client instance
     
     Returns:
-        dict with final overall_score and overall_summary
+        The overall summary text
     """
     if not llm_client.available():
-        raise Exception("LLM client not available for final aggregation")
+        raise Exception("LLM client not available for the final summary")
     
     try:
-        logger.info("Starting final aggregation")
-        
-        # Build aggregation prompt
-        prompt = build_final_aggregation_prompt(
-            cv_result=cv_result,
-            project_result=project_result,
-            job_title=job_title
-        )
-        
-        # Call LLM with structured JSON output (uses configured temperature)
-        result = llm_client.eval_json(
-            prompt=prompt,
-            system=FINAL_AGGREGATION_SYSTEM
-        )
+        logger.info("Writing final summary")
+        prompt = build_final_aggregation_prompt(cv_result, project_result, job_title, final)
+        result = llm_client.eval_json(prompt=prompt, system=FINAL_AGGREGATION_SYSTEM)
+        return result.get("overall_summary", "")
         
-        logger.info(f"Final aggregation completed: overall_score={result.get('overall_score', 0)}")
-        return result
+    except Exception as e:
+        logger.error(f"Error writing final summary: {e}")
+        raise
+
+
+async def write_summary_async(cv_result: dict, project_result: dict, final: dict, job_title: str,
+                              llm_client: AsyncLLMClient) -> str:
+    """Async variant of write_summary."""
+    if not llm_client.available():
+        raise Exception("LLM client not available for the final summary")
+    
+    try:
+        logger.info("Writing final summary")
+        prompt = build_final_aggregation_prompt(cv_result, project_result, job_title, final)
+        result = await llm_client.eval_json(prompt=prompt, system=FINAL_AGGREGATION_SYSTEM)
+        return result.get("overall_summary", "")
         
     except Exception as e:
-        logger.error(f"Error in final aggregation: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Error writing final summary: {e}")
+        raise
@@ -1,14 +1,39 @@
 """
 Project report evaluation using LLM with RAG-enhanced prompts.
 """
-from app.llm.client import LLMClient
+from app.llm.client import LLMClient, AsyncLLMClient
 from app.llm.prompts import PROJECT_EVALUATION_SYSTEM, build_project_evaluation_prompt
 from app.rag.retrieve import retrieve_context
+from app.config import settings
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def build_project_prompt(project_text: str) -> str:
+    """Retrieve RAG context and build the project evaluation prompt."""
+    # Retrieve relevant context from vector DB
+    case_study_brief = retrieve_context(
+        query="case study brief requirements and deliverables",
+        collection="case_study",
+        top_k=3
+    )
+    
+    scoring_rubric = retrieve_context(
+        query="project evaluation scoring rubric parameters",
+        collection="scoring_rubrics",
+        top_k=2
+    )
+    
+    # Build prompt with RAG context
+    return build_project_evaluation_prompt(
+        project_text=project_text[:settings.report_max_chars],  # Limit to avoid token limits
+        case_study_brief=case_study_brief,
+        scoring_rubric=scoring_rubric
+    )
+
+
 def evaluate_project(project_text: str, llm_client: LLMClient) -> dict:
     """
     Evaluate a project report against case study brief using LLM.
@@ -25,26 +50,7 @@ def evaluate_project(project_text: str, llm_client: LLMClient) -> dict:
     
     try:
         logger.info("Starting project evaluation with RAG")
-        
-        # Retrieve relevant context from vector DB
-        case_study_brief = retrieve_context(
-            query="case study brief requirements and deliverables",
-            collection="case_study",
-            top_k=3
-        )
-        
-        scoring_rubric = retrieve_context(
-            query="project evaluation scoring rubric parameters",
-            collection="scoring_rubrics",
-            top_k=2
-        )
-        
-        # Build prompt with RAG context
-        prompt = build_project_evaluation_prompt(
-            project_text=project_text[:10000],  # Limit to avoid token limits
-            case_study_brief=case_study_brief,
-            scoring_rubric=scoring_rubric
-        )
+        prompt = build_project_prompt(project_text)
         
         # Call LLM with structured JSON output (uses configured temperature)
         result = llm_client.eval_json(
@@ -57,4 +63,21 @@ def evaluate_project(project_text: str, llm_client: LLMClient) -> dict:
         
     except Exception as e:
         logger.error(f"Error in project evaluation: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def evaluate_project_async(project_text: str, llm_client: AsyncLLMClient) -> dict:
+    """Async variant of evaluate_project; retrieval runs in a thread, the LLM call on the loop."""
+    if not llm_client.available():
+        raise Exception("LLM client not available for project evaluation")
+    
+    try:
+        logger.info("Starting project evaluation with RAG")
+        prompt = await asyncio.to_thread(build_project_prompt, project_text)
+        result = await llm_client.eval_json(prompt=prompt, system=PROJECT_EVALUATION_SYSTEM)
+        logger.info(f"Project evaluation completed: score={result.get('project_score', 0)}")
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in project evaluation: {e}")
+        raise
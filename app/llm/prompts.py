@@ -2,6 +2,10 @@
 Prompt templates for LLM-powered evaluation.
 """
 
+# Bump whenever a prompt template below changes: it is part of the evaluation
+# result cache key, so older cached results stop matching.
+PROMPT_VERSION = "2"
+
 CV_EVALUATION_SYSTEM = """You are an expert technical recruiter and HR specialist. Your job is to evaluate a candidate's CV against a specific job description and scoring rubric.
 
 You must provide objective, data-driven assessments based on the information provided. Be fair but thorough in your evaluation.
@@ -125,8 +129,8 @@ Be balanced, fair, and actionable in your recommendations. Focus on candidate po
 
 Always respond with valid JSON only, no additional text."""
 
-def build_final_aggregation_prompt(cv_result: dict, project_result: dict, job_title: str) -> str:
-    """Build prompt for final aggregation of CV and project evaluations."""
+def build_final_aggregation_prompt(cv_result: dict, project_result: dict, job_title: str, final: dict) -> str:
+    """Build prompt for the narrative summary; `final` holds the already computed overall score and recommendation."""
     return f"""Synthesize the following evaluation results into a final overall assessment for the position of {job_title}.
 
 CV EVALUATION RESULTS:
@@ -146,20 +150,17 @@ PROJECT EVALUATION RESULTS:
 - Documentation: {project_result.get('documentation', {}).get('score', 0)}/5
 - Creativity: {project_result.get('creativity', {}).get('score', 0)}/5
 
-Based on these evaluations, provide:
-1. An overall summary (3-5 sentences) that:
-   - Highlights the candidate's key strengths
-   - Identifies any notable gaps or areas for improvement
-   - Provides a clear recommendation (strong fit / moderate fit / needs development / not recommended)
-   - Mentions specific next steps or considerations
+OVERALL (computed from the rubric weights, do not change):
+- Overall Score: {final.get('overall_score', 0)}/5
+- Recommendation: {final.get('recommendation', 'N/A')}
 
-2. Calculate an overall score that weighs:
-   - CV evaluation: 30% weight
-   - Project evaluation: 70% weight
+Based on these evaluations, write an overall summary (3-5 sentences) that:
+- Highlights the candidate's key strengths
+- Identifies any notable gaps or areas for improvement
+- Explains the recommendation above
+- Mentions specific next steps or considerations
 
 Respond with JSON in this exact format:
 {{
-  "overall_score": <1.00-5.00>,
-  "overall_summary": "<text>",
-  "recommendation": "<strong fit|moderate fit|needs development|not recommended>"
-}}"""
\ No newline at end of file
+  "overall_summary": "<text>"
+}}"""
@@ -0,0 +1,146 @@
+"""
+Distributed token-bucket rate limiting for OpenAI calls.
+
+Every worker process consults the same pair of buckets per model in Redis
+(requests/min and estimated tokens/min) before calling the API, so a burst of
+jobs is smoothed to the account limits instead of hitting 429s and backing
+off in lockstep. Buckets are refilled and debited atomically by a Lua script
+using Redis server time, so clocks on worker hosts do not matter.
+"""
+from __future__ import annotations
+from app.config import settings
+from app.utils.redis_client import get_redis
+import asyncio
+import logging
+import random
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS: requests bucket, tokens bucket
+# ARGV: request capacity, request refill/sec, token capacity, token refill/sec, token cost
+# Returns seconds to wait before retrying (as a string), "0" if the call may proceed
+_TOKEN_BUCKET_LUA = """
+local now_t = redis.call('TIME')
+local now = tonumber(now_t[1]) + tonumber(now_t[2]) / 1000000
+
+local function level(key, cap, rate)
+    local v = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(v[1]) or cap
+    local ts = tonumber(v[2]) or now
+    return math.min(cap, tokens + math.max(0, now - ts) * rate)
+end
+
+local req_cap, req_rate = tonumber(ARGV[1]), tonumber(ARGV[2])
+local tok_cap, tok_rate = tonumber(ARGV[3]), tonumber(ARGV[4])
+-- A single call larger than the whole bucket would otherwise wait forever
+local cost = math.min(tonumber(ARGV[5]), tok_cap)
+
+local reqs = level(KEYS[1], req_cap, req_rate)
+local toks = level(KEYS[2], tok_cap, tok_rate)
+
+local wait = 0
+if reqs < 1 then wait = math.max(wait, (1 - reqs) / req_rate) end
+if toks < cost then wait = math.max(wait, (cost - toks) / tok_rate) end
+if wait == 0 then
+    reqs = reqs - 1
+    toks = toks - cost
+end
+
+redis.call('HSET', KEYS[1], 'tokens', reqs, 'ts', now)
+redis.call('HSET', KEYS[2], 'tokens', toks, 'ts', now)
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+return tostring(wait)
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class RateLimiter:
+    """Per-model RPM + TPM token buckets shared through Redis."""
+
+    def __init__(self, client: redis.Redis, prefix: str = "ratelimit") -> None:
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    def limits(self, model: str) -> tuple[int, int]:
+        """(requests/min, tokens/min) for a model, falling back to the defaults."""
+        limits = settings.openai_rate_limits.get(model, {})
+        return (
+            int(limits.get("rpm", settings.openai_default_rpm)),
+            int(limits.get("tpm", settings.openai_default_tpm)),
+        )
+
+    def try_acquire(self, model: str, tokens: int) -> float:
+        """Debit one request and `tokens` if both buckets allow it; otherwise return seconds to wait."""
+        rpm, tpm = self.limits(model)
+        wait = self._script(
+            keys=[f"{self.prefix}:{model}:rpm", f"{self.prefix}:{model}:tpm"],
+            args=[rpm, rpm / 60.0, tpm, tpm / 60.0, tokens],
+        )
+        return float(wait)
+
+    def _next_wait(self, model: str, tokens: int, deadline: float) -> float:
+        wait = self.try_acquire(model, tokens)
+        if wait <= 0:
+            return 0.0
+        if time.monotonic() + wait > deadline:
+            raise TimeoutError(f"Rate limit wait for {model} exceeds {settings.rate_limit_max_wait_seconds}s")
+        # Jitter so waiting workers do not all retry in the same instant
+        return wait + random.uniform(0, 0.1 + wait * 0.1)
+
+    def acquire(self, model: str, tokens: int) -> None:
+        """Block until a call of `tokens` estimated tokens fits within the model's limits."""
+        deadline = time.monotonic() + settings.rate_limit_max_wait_seconds
+        while (wait := self._next_wait(model, tokens, deadline)) > 0:
+            logger.info(f"Rate limited on {model}, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    async def acquire_async(self, model: str, tokens: int) -> None:
+        """Async version of `acquire`; the Redis round-trip runs in a thread."""
+        deadline = time.monotonic() + settings.rate_limit_max_wait_seconds
+        while (wait := await asyncio.to_thread(self._next_wait, model, tokens, deadline)) > 0:
+            logger.info(f"Rate limited on {model}, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """Get the process-wide limiter, or None when rate limiting is disabled."""
+    global _limiter
+    if not settings.rate_limit_enabled:
+        return None
+    if _limiter is None:
+        _limiter = RateLimiter(get_redis())
+    return _limiter
+
+
+def acquire(model: str, tokens: int) -> None:
+    """Wait for rate-limit capacity before an OpenAI call (no-op when disabled)."""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return
+    try:
+        limiter.acquire(model, tokens)
+    except redis.RedisError as e:
+        # Fail open: a limiter outage must not stop evaluations; tenacity still handles 429s
+        logger.warning(f"Rate limiter unavailable, proceeding without it: {e}")
+
+
+async def acquire_async(model: str, tokens: int) -> None:
+    """Async version of `acquire`."""
+    limiter = get_rate_limiter()
+    if limiter is None:
+        return
+    try:
+        await limiter.acquire_async(model, tokens)
+    except redis.RedisError as e:
+        logger.warning(f"Rate limiter unavailable, proceeding without it: {e}")
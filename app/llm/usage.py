@@ -0,0 +1,72 @@
+"""
+Per-call LLM usage records.
+
+Every OpenAI request attempt made by the LLM clients produces one record
+(model, prompt/completion/cached tokens, wall time, attempt number, error).
+Records go to the sink installed by `capture_usage()` for the current context,
+so the stage graph can collect the calls a stage made and store them on its
+`Stage` row. Outside a capture they are dropped (metrics are still recorded).
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_sink: ContextVar[list[dict] | None] = ContextVar("llm_usage_sink", default=None)
+# Attempt number of the request in progress, set by tenacity's `before` hook
+_attempt: ContextVar[int] = ContextVar("llm_attempt", default=1)
+
+
+@contextmanager
+def capture_usage() -> Iterator[list[dict]]:
+    """Collect the usage records of LLM calls made inside the block into the yielded list."""
+    records: list[dict] = []
+    token = _sink.set(records)
+    try:
+        yield records
+    finally:
+        _sink.reset(token)
+
+
+def note_attempt(retry_state) -> None:
+    """tenacity `before` hook: remember which attempt of the call is about to run."""
+    _attempt.set(retry_state.attempt_number)
+
+
+def record_call(model: str, usage, seconds: float, error: str | None = None) -> None:
+    """Append one request attempt to the active sink, if any."""
+    records = _sink.get()
+    if records is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    records.append({
+        "model": model,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", None) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        "latency_ms": round(seconds * 1000, 1),
+        "retries": _attempt.get() - 1,
+        "error": error,
+    })
+
+
+def summarize(records: list[dict]) -> dict:
+    """Totals over usage records: calls, tokens, latency and retries."""
+    return {
+        "calls": len(records),
+        "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+        "completion_tokens": sum(r["completion_tokens"] for r in records),
+        "cached_tokens": sum(r["cached_tokens"] for r in records),
+        "latency_ms": round(sum(r["latency_ms"] for r in records), 1),
+        "max_latency_ms": max((r["latency_ms"] for r in records), default=0.0),
+        "retries": sum(1 for r in records if r["retries"]),
+        "errors": sum(1 for r in records if r["error"]),
+    }
+
+
+def merge_totals(a: dict, b: dict) -> dict:
+    """Combine two `summarize()` results."""
+    merged = {key: a[key] + b[key] for key in a}
+    merged["latency_ms"] = round(merged["latency_ms"], 1)
+    merged["max_latency_ms"] = max(a["max_latency_ms"], b["max_latency_ms"])
+    return merged
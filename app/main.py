@@ -1,12 +1,20 @@
-﻿from fastapi import FastAPI
+﻿from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routers import health, upload, evaluate, result
+from app.api.routers import health, upload, evaluate, result, metrics, usage, rescore
 from app.persistence.db import init_db
+from app.services.extraction import shutdown_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_pool()
 
 
 def create_app() -> FastAPI:
     init_db()
-    app = FastAPI(title="cv-project-evaluator-api")
+    app = FastAPI(title="cv-project-evaluator-api", lifespan=lifespan)
     
     # Configure CORS
     app.add_middleware(
@@ -21,6 +29,9 @@ def create_app() -> FastAPI:
     app.include_router(upload.router)
     app.include_router(evaluate.router)
     app.include_router(result.router)
+    app.include_router(usage.router)
+    app.include_router(rescore.router)
+    app.include_router(metrics.router)
     return app
 
 app = create_app()
@@ -0,0 +1,107 @@
+"""
+Async versions of the repository functions used by the API routers.
+
+They mirror `repo.py` one to one, so the event loop never waits on a DB
+round-trip or commit. Workers keep using the sync functions.
+"""
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from .models import Batch, File, FileKind, Job, Stage
+from datetime import datetime
+from typing import Optional
+
+# Files
+
+async def create_file(db: AsyncSession, kind: FileKind, original_name: str, path: str,
+                      sha256: str | None = None) -> File:
+    f = File(kind=kind, original_name=original_name, path=path, sha256=sha256)
+    db.add(f)
+    await db.commit()
+    return f
+
+async def get_file_by_sha256(db: AsyncSession, kind: FileKind, sha256: str) -> Optional[File]:
+    return (await db.execute(
+        select(File).where(File.kind == kind, File.sha256 == sha256).limit(1)
+    )).scalar_one_or_none()
+
+async def get_files_by_ids(db: AsyncSession, file_ids: list[str]) -> dict[str, File]:
+    """Load many files with a single IN query, keyed by id."""
+    files = (await db.execute(select(File).where(File.id.in_(set(file_ids))))).scalars()
+    return {f.id: f for f in files}
+
+# Jobs
+
+async def create_job(db: AsyncSession, job_title: str, cv_file_id: str, report_file_id: str,
+                     force_refresh: bool = False) -> Job:
+    job = Job(job_title=job_title, cv_file_id=cv_file_id, report_file_id=report_file_id,
+              force_refresh=force_refresh)
+    db.add(job)
+    await db.commit()
+    return job
+
+async def create_batch(db: AsyncSession, job_title: str, pairs: list[tuple[str, str]],
+                       force_refresh: bool = False) -> tuple[Batch, list[str]]:
+    """Create a batch and one job per (cv_file_id, report_file_id) pair in one transaction."""
+    batch = Batch(job_title=job_title)
+    jobs = [Job(job_title=job_title, cv_file_id=cv_id, report_file_id=report_id,
+                force_refresh=force_refresh, batch=batch)
+            for cv_id, report_id in pairs]
+    db.add_all([batch, *jobs])
+    await db.commit()
+    return batch, [job.id for job in jobs]
+
+async def get_batch_progress(db: AsyncSession, batch_id: str) -> Optional[tuple[Batch, dict[str, int]]]:
+    """(batch, job count per status) or None if the batch does not exist."""
+    batch = await db.get(Batch, batch_id)
+    if not batch:
+        return None
+    rows = (await db.execute(
+        select(Job.status, func.count()).where(Job.batch_id == batch_id).group_by(Job.status)
+    )).all()
+    return batch, {status.value: count for status, count in rows}
+
+async def get_job(db: AsyncSession, job_id: str, with_stages: bool = False) -> Optional[Job]:
+    # Relationships cannot lazy-load under asyncio, so stages are loaded on request
+    options = [selectinload(Job.stages)] if with_stages else []
+    return await db.get(Job, job_id, options=options)
+
+async def get_job_state(db: AsyncSession, job_id: str):
+    """(id, status, updated_at) of a job without loading its result JSON, or None."""
+    return (await db.execute(
+        select(Job.id, Job.status, Job.updated_at).where(Job.id == job_id)
+    )).first()
+
+async def update_job_result(db: AsyncSession, job_id: str, result: dict,
+                            expected_updated_at: Optional[datetime] = None) -> bool:
+    """Store a job's result; with `expected_updated_at`, only if the row was not changed since."""
+    stmt = update(Job).where(Job.id == job_id).values(result_json=result)
+    if expected_updated_at is not None:
+        stmt = stmt.where(Job.updated_at == expected_updated_at)
+    updated = (await db.execute(stmt)).rowcount > 0
+    await db.commit()
+    return updated
+
+# Usage
+
+async def get_stage_usage(db: AsyncSession, job_id: str):
+    """(name, started_at, ended_at, cache_hit, model_tier, usage_json) of a job's stages in start order."""
+    return (await db.execute(
+        select(Stage.name, Stage.started_at, Stage.ended_at, Stage.cache_hit, Stage.model_tier, Stage.usage_json)
+        .where(Stage.job_id == job_id).order_by(Stage.started_at)
+    )).all()
+
+async def iter_usage_by_job_title(db: AsyncSession, job_title: str | None = None,
+                                  since: datetime | None = None):
+    """Stream (job_title, job_id, stage name, usage_json) for stages that made LLM calls."""
+    query = (
+        select(Job.job_title, Job.id, Stage.name, Stage.usage_json)
+        .join(Stage, Stage.job_id == Job.id)
+        .where(Stage.usage_json.is_not(None))
+    )
+    if job_title is not None:
+        query = query.where(Job.job_title == job_title)
+    if since is not None:
+        query = query.where(Job.created_at >= since)
+    async for row in await db.stream(query.execution_options(yield_per=500)):
+        yield row
@@ -1,9 +1,62 @@
-﻿from sqlalchemy import create_engine
+﻿from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
-engine = create_engine(settings.database_url, future=True, echo=False)
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    # WAL lets readers (API) proceed while a writer (worker) commits; with WAL,
+    # synchronous=NORMAL only risks the last commits on power loss, not corruption
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cur.close()
+
+def build_engine(url: str) -> Engine:
+    """Engine configured for the backend: pragmas for SQLite, pool sizing for servers."""
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_engine(url, future=True, echo=False,
+                               connect_args={"check_same_thread": False})
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        return engine
+    return create_engine(
+        url, future=True, echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        # Drop connections the server or a proxy closed while idle
+        pool_pre_ping=True,
+    )
+
+# Async drivers for the API's event loop; workers keep the sync engine
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """The same database addressed through its asyncio driver."""
+    u = make_url(url)
+    return u.set(drivername=_ASYNC_DRIVERS.get(u.get_backend_name(), u.drivername)).render_as_string(hide_password=False)
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """Async counterpart of build_engine, with the same per-backend settings."""
+    async_url = async_database_url(url)
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_async_engine(async_url, echo=False)
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+    return create_async_engine(
+        async_url, echo=False,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=True,
+    )
+
+engine = build_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+async_engine = build_async_engine(settings.database_url)
+# Objects stay usable after commit without an (awaitable-only) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def init_db() -> None:
@@ -16,4 +69,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
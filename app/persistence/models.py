@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Enum as SAEnum, ForeignKey, DateTime, Text, JSON
+from sqlalchemy import String, Enum as SAEnum, ForeignKey, DateTime, Text, JSON, Boolean, Integer, Float
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -13,39 +13,76 @@ class FileKind(str, Enum):
 class File(Base):
     __tablename__ = "files"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    kind: Mapped[FileKind] = mapped_column(SAEnum(FileKind), nullable=False)
+    kind: Mapped[FileKind] = mapped_column(SAEnum(FileKind), nullable=False, index=True)
     original_name: Mapped[str] = mapped_column(String, nullable=False)
     path: Mapped[str] = mapped_column(String, nullable=False)
+    # Content hash; uploads are stored content-addressed and deduplicated on it
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
+class FileText(Base):
+    """Text extracted from an uploaded file, kept apart so loading a File stays cheap."""
+    __tablename__ = "file_texts"
+    file_id: Mapped[str] = mapped_column(String, ForeignKey("files.id"), primary_key=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Pages parsed; extraction stops at the character budget for the file kind
+    page_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    truncated: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    extraction_ms: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    extracted_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
 class JobStatus(str, Enum):
     queued = "queued"
     processing = "processing"
     completed = "completed"
     failed = "failed"
 
+class Batch(Base):
+    """Jobs submitted together through /evaluate/batch for one job title."""
+    __tablename__ = "batches"
+    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_title: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
 class Job(Base):
     __tablename__ = "jobs"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     job_title: Mapped[str] = mapped_column(String, nullable=False)
     cv_file_id: Mapped[str] = mapped_column(String, ForeignKey("files.id"), nullable=False)
     report_file_id: Mapped[str] = mapped_column(String, ForeignKey("files.id"), nullable=False)
-    status: Mapped[JobStatus] = mapped_column(SAEnum(JobStatus), default=JobStatus.queued, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    status: Mapped[JobStatus] = mapped_column(SAEnum(JobStatus), default=JobStatus.queued, nullable=False, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     result_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Hash of a completed evaluation's inputs (see result_cache.evaluation_cache_key): the
+    # uploaded files' sha256s, not their text, so the lookup does not wait for extraction,
+    # plus the character budgets, job title, prompt and corpus versions and model settings;
+    # identical later submissions reuse its result
+    cache_key: Mapped[str | None] = mapped_column(String, nullable=True, index=True)
+    # Requested fresh evaluation: skip the result cache
+    force_refresh: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    batch_id: Mapped[str | None] = mapped_column(String, ForeignKey("batches.id"), nullable=True, index=True)
 
     cv_file: Mapped[File] = relationship(foreign_keys=[cv_file_id])
     report_file: Mapped[File] = relationship(foreign_keys=[report_file_id])
+    batch: Mapped[Batch | None] = relationship()
     stages: Mapped[list[Stage]] = relationship("Stage", back_populates="job", cascade="all, delete-orphan")
 
 class Stage(Base):
     __tablename__ = "stages"
     id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    job_id: Mapped[str] = mapped_column(String, ForeignKey("jobs.id"), nullable=False)
+    job_id: Mapped[str] = mapped_column(String, ForeignKey("jobs.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
     started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
     ended_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     logs: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Stage output checkpoint, used to resume a retried job without redoing finished stages
+    output_json: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    # Output was served from the evaluation cache instead of being computed
+    cache_hit: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    # One record per LLM request attempt made by the stage (tokens, latency, retries; see app.llm.usage)
+    usage_json: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    # Model cascade tier ("fast"/"strong") that produced the output, for LLM stages run in cascade mode
+    model_tier: Mapped[str | None] = mapped_column(String(16), nullable=True)
 
     job: Mapped[Job] = relationship("Job", back_populates="stages")
\ No newline at end of file
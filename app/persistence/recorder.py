@@ -0,0 +1,78 @@
+﻿"""
+Unit-of-work persistence for one evaluation run.
+
+Committing every stage start and end separately costs a round-trip and an
+fsync each. `StageRecorder` instead adds stage rows to the session and
+commits them together at a few points: after stages that are expensive to
+redo (so their checkpoints survive a crash), and with the job's final result
+and status in a single transaction. Progress events are still published as
+each stage starts and ends.
+"""
+from __future__ import annotations
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from .models import Job, JobStatus, Stage
+from app.utils.events import publish_job_event, stage_event, status_event
+import uuid
+
+
+class StageRecorder:
+    """Buffers a job's stage rows in the session and writes them in few transactions."""
+
+    def __init__(self, db: Session, job_id: str) -> None:
+        self.db = db
+        self.job_id = job_id
+
+    def set_status(self, status: JobStatus) -> None:
+        """Commit a status change (and any buffered stages) immediately."""
+        if not self.db.is_active:
+            self.db.rollback()
+        self.db.execute(update(Job).where(Job.id == self.job_id).values(status=status))
+        self.db.commit()
+        publish_job_event(self.job_id, status_event(self.job_id, status.value))
+
+    def start(self, name: str) -> Stage:
+        st = Stage(id=str(uuid.uuid4()), job_id=self.job_id, name=name, started_at=datetime.utcnow())
+        self.db.add(st)
+        publish_job_event(self.job_id, stage_event(st))
+        return st
+
+    def end(self, st: Stage, logs: str | None = None, output: dict | None = None,
+            cache_hit: bool = False, usage: list[dict] | None = None, model_tier: str | None = None) -> None:
+        st.ended_at = datetime.utcnow()
+        if logs:
+            st.logs = (st.logs or "") + logs
+        if output is not None:
+            st.output_json = output
+        st.cache_hit = cache_hit
+        if usage:
+            st.usage_json = usage
+        if model_tier:
+            st.model_tier = model_tier
+        publish_job_event(self.job_id, stage_event(st))
+
+    def flush(self) -> None:
+        """Commit the stages buffered so far."""
+        self.db.commit()
+
+    def checkpoints(self) -> dict[str, dict]:
+        """Saved outputs of committed, finished stages keyed by stage name."""
+        rows = self.db.execute(
+            select(Stage.name, Stage.output_json)
+            .where(Stage.job_id == self.job_id, Stage.ended_at.is_not(None), Stage.output_json.is_not(None))
+            .order_by(Stage.ended_at)
+        ).all()
+        return {name: output for name, output in rows}
+
+    def finish(self, status: JobStatus, result: dict, cache_key: str | None = None) -> None:
+        """Write buffered stages, the result and the final status in one transaction."""
+        if not self.db.is_active:
+            # A failed flush left the transaction unusable; drop it and record the outcome
+            self.db.rollback()
+        values = {"status": status, "result_json": result}
+        if cache_key:
+            values["cache_key"] = cache_key
+        self.db.execute(update(Job).where(Job.id == self.job_id).values(**values))
+        self.db.commit()
+        publish_job_event(self.job_id, status_event(self.job_id, status.value))
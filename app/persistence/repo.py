@@ -1,26 +1,27 @@
 ﻿from sqlalchemy.orm import Session
 from sqlalchemy import select
-from .models import File, FileKind, Job, JobStatus, Stage
+from .models import FileText, Job, JobStatus
+from app.utils.events import publish_job_event, status_event
 from typing import Optional
 
 # Files
 
-def create_file(db: Session, kind: FileKind, original_name: str, path: str) -> File:
-    f = File(kind=kind, original_name=original_name, path=path)
-    db.add(f)
+def get_file_text(db: Session, file_id: str) -> Optional[FileText]:
+    return db.get(FileText, file_id)
+
+def save_file_text(db: Session, file_id: str, text: str, page_count: int, extraction_ms: float,
+                   truncated: bool = False) -> FileText:
+    ft = db.get(FileText, file_id) or FileText(file_id=file_id)
+    ft.text = text
+    ft.page_count = page_count
+    ft.truncated = truncated
+    ft.extraction_ms = extraction_ms
+    db.add(ft)
     db.commit()
-    db.refresh(f)
-    return f
+    return ft
 
 # Jobs
 
-def create_job(db: Session, job_title: str, cv_file_id: str, report_file_id: str) -> Job:
-    job = Job(job_title=job_title, cv_file_id=cv_file_id, report_file_id=report_file_id)
-    db.add(job)
-    db.commit()
-    db.refresh(job)
-    return job
-
 def get_job(db: Session, job_id: str) -> Optional[Job]:
     return db.get(Job, job_id)
 
@@ -30,31 +31,16 @@ def set_job_status(db: Session, job_id: str, status: JobStatus) -> None:
         return
     job.status = status
     db.commit()
-
-# Stages
-
-def start_stage(db: Session, job_id: str, name: str) -> Stage:
-    st = Stage(job_id=job_id, name=name)
-    db.add(st)
-    db.commit()
-    db.refresh(st)
-    return st
-
-def end_stage(db: Session, stage_id: str, logs: str | None = None) -> None:
-    st = db.get(Stage, stage_id)
-    if not st:
-        return
-    from datetime import datetime
-    st.ended_at = datetime.utcnow()
-    if logs:
-        st.logs = (st.logs or "") + logs
-    db.commit()
+    publish_job_event(job_id, status_event(job_id, status.value))
 
 # Results
 
-def set_job_result(db: Session, job_id: str, result: dict) -> None:
-    job = db.get(Job, job_id)
-    if not job:
-        return
-    job.result_json = result
-    db.commit()
\ No newline at end of file
+def find_cached_result(db: Session, cache_key: str) -> Optional[tuple[str, dict]]:
+    """Latest completed (job id, result) evaluated with the same cache key, if any."""
+    row = db.execute(
+        select(Job.id, Job.result_json)
+        .where(Job.cache_key == cache_key, Job.status == JobStatus.completed)
+        .order_by(Job.updated_at.desc())
+        .limit(1)
+    ).first()
+    return (row[0], row[1]) if row else None
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Persistent embedding cache shared by all processes on a host.
+
+Vectors are stored as float32 BLOBs in a small SQLite database keyed by
+(model, sha256(text)), so system documents and the fixed retrieval queries
+are embedded once instead of once per worker process and per job. Entries
+are evicted least-recently-used once the cache grows past its size limit.
+
+The cache is an optimization only: SQLite errors (a locked database, a full
+disk, a read-only path) are logged and treated as misses or skipped writes.
+"""
+from __future__ import annotations
+from array import array
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Optional
+from app.config import settings
+from app.utils.metrics import record_cache
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used);
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+    """SQLite-backed (model, sha256(text)) -> float32 vector store with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Row count as of the last COUNT(*) plus rows written by this process since;
+        # other processes' writes are picked up at the next recount
+        self._approx_entries = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork (Celery prefork children)
+        if self._conn is None or self._pid != os.getpid():
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            (self._approx_entries,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[int, List[float]]:
+        """Return cached vectors keyed by position in `texts`."""
+        if not texts:
+            return {}
+        hashes = [text_hash(t) for t in texts]
+        unique = list(set(hashes))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            try:
+                conn = self._connection()
+                # Stay under SQLite's bound-parameter limit
+                for i in range(0, len(unique), 500):
+                    part = unique[i:i + 500]
+                    marks = ",".join("?" * len(part))
+                    rows = conn.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({marks})",
+                        [model, *part],
+                    ).fetchall()
+                    found.update((h, _unpack(blob)) for h, blob in rows)
+                if found:
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                        [(time.time(), model, h) for h in found],
+                    )
+            except (sqlite3.Error, OSError) as e:
+                # Vectors read before the error are still good; the rest count as misses
+                logger.warning(f"Embedding cache read failed, treating as a miss: {e}")
+        result = {i: found[h] for i, h in enumerate(hashes) if h in found}
+        self.hits += len(result)
+        self.misses += len(texts) - len(result)
+        record_cache("embedding", hits=len(result), misses=len(texts) - len(result))
+        return result
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text]).get(0)
+
+    def put_many(self, model: str, items: Dict[str, List[float]]) -> None:
+        """Store vectors keyed by their source text, then evict if over capacity."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(model, text_hash(t), _pack(v), now) for t, v in items.items()]
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                # Replaced rows are counted too, so the estimate only errs towards recounting early
+                self._approx_entries += len(rows)
+                if self._approx_entries > self.max_entries:
+                    self._evict(conn)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Embedding cache write failed, skipping: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Recount the table and drop the least recently used entries over capacity."""
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            logger.info(f"Embedding cache evicted {count - self.max_entries} entries")
+            count = self.max_entries
+        self._approx_entries = count
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        self.put_many(model, {text: vector})
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the process-wide embedding cache, or None when disabled."""
+    global _cache
+    if not settings.embedding_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_max_entries)
+        logger.info(f"Initialized embedding cache at {settings.embedding_cache_path}")
+    return _cache
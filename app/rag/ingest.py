@@ -1,85 +1,119 @@
 ﻿"""
 Document ingestion script for RAG system.
 Processes system documents and stores them in Qdrant vector database.
+
+Ingestion is incremental: a manifest of (collection, file path, content hash,
+chunk ids) is kept in the `ingest_manifest` collection next to the data.
+Unchanged files are skipped, changed files have their chunks replaced, and
+files that disappeared have their points deleted. Collections are never
+dropped (unless forced), so searches keep working while ingestion runs.
 """
 from pathlib import Path
+from datetime import datetime
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, PointIdsList, Filter, FieldCondition, MatchValue,
+)
 from app.utils.pdf import extract_text
 from app.rag.chunking import chunk_by_paragraphs
-from app.rag.retrieve import get_embedding, get_qdrant_client
+from app.rag.retrieve import get_embeddings, get_qdrant_client, bump_corpus_version, get_corpus_version
+import hashlib
 import logging
+import sys
 import uuid
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 SYSTEM_DOCS_PATH = Path("data/system_docs")
+MANIFEST_COLLECTION = "ingest_manifest"
+SUPPORTED_SUFFIXES = ['.txt', '.pdf']
+
+
+def file_sha256(file_path: Path) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _chunk_id(collection_name: str, source: str, content_hash: str, index: int) -> str:
+    # Deterministic ids: re-ingesting identical content overwrites instead of duplicating
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{collection_name}:{source}:{content_hash}:{index}"))
+
 
+def _manifest_id(collection_name: str, source: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"manifest:{collection_name}:{source}"))
 
-def ingest_document(file_path: Path, collection_name: str, client: QdrantClient) -> int:
+
+def ingest_document(file_path: Path, collection_name: str, client: QdrantClient,
+                    content_hash: str | None = None) -> tuple[list[str], bool]:
     """
     Ingest a single document into vector database.
-    
+
     Args:
         file_path: Path to document file
         collection_name: Target collection name
         client: Qdrant client instance
-    
+        content_hash: sha256 of the file, computed if not given
+
     Returns:
-        Number of chunks ingested
+        (ids of the chunks ingested, whether every chunk was embedded)
     """
     logger.info(f"Ingesting {file_path.name} into {collection_name}")
-    
+    content_hash = content_hash or file_sha256(file_path)
+
     # Extract text
     if file_path.suffix.lower() == '.pdf':
         text = extract_text(str(file_path))
     else:
         text = file_path.read_text(encoding='utf-8')
-    
+
     if not text.strip():
         logger.warning(f"Empty document: {file_path.name}")
-        return 0
-    
+        return [], True
+
     # Chunk text
     chunks = chunk_by_paragraphs(text, max_chunk_size=800)
     logger.info(f"Created {len(chunks)} chunks from {file_path.name}")
-    
-    # Create embeddings and points
+
+    # Create embeddings (batched) and points
+    embeddings = get_embeddings(chunks)
     points = []
-    for i, chunk in enumerate(chunks):
-        try:
-            embedding = get_embedding(chunk)
-            point = PointStruct(
-                id=str(uuid.uuid4()),
-                vector=embedding,
-                payload={
-                    "text": chunk,
-                    "source": file_path.name,
-                    "chunk_index": i
-                }
-            )
-            points.append(point)
-        except Exception as e:
-            logger.error(f"Error creating embedding for chunk {i}: {e}")
+    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+        if embedding is None:
+            logger.error(f"Error creating embedding for chunk {i} of {file_path.name}, skipping")
             continue
-    
+        point = PointStruct(
+            id=_chunk_id(collection_name, file_path.as_posix(), content_hash, i),
+            vector=embedding,
+            payload={
+                "text": chunk,
+                "source": file_path.name,
+                "chunk_index": i
+            }
+        )
+        points.append(point)
+
     # Upsert to collection
     if points:
         client.upsert(collection_name=collection_name, points=points)
         logger.info(f"Ingested {len(points)} chunks from {file_path.name}")
-    
-    return len(points)
 
+    return [str(p.id) for p in points], len(points) == len(chunks)
 
-def create_collection(client: QdrantClient, collection_name: str, vector_size: int = 1536):
-    """Create a collection if it doesn't exist."""
+
+def create_collection(client: QdrantClient, collection_name: str, vector_size: int = 1536,
+                      recreate: bool = False):
+    """Create a collection if it doesn't exist (drop and recreate it if `recreate`)."""
     try:
-        collections = client.get_collections()
-        if any(c.name == collection_name for c in collections.collections):
+        if client.collection_exists(collection_name):
+            if not recreate:
+                return
             logger.info(f"Collection {collection_name} already exists, recreating...")
             client.delete_collection(collection_name)
-        
+
         client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
@@ -90,51 +124,141 @@ def create_collection(client: QdrantClient, collection_name: str, vector_size: i
         raise
 
 
-def run():
-    """Main ingestion function."""
+def load_manifest(client: QdrantClient, collection_name: str) -> dict[str, dict]:
+    """Return manifest entries of a collection keyed by source file path."""
+    entries: dict[str, dict] = {}
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=MANIFEST_COLLECTION,
+            scroll_filter=Filter(must=[FieldCondition(key="collection", match=MatchValue(value=collection_name))]),
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            entries[point.payload["path"]] = point.payload
+        if offset is None:
+            return entries
+
+
+def _save_manifest_entry(client: QdrantClient, collection_name: str, source: str,
+                         content_hash: str | None, chunk_ids: list[str]) -> None:
+    client.upsert(
+        collection_name=MANIFEST_COLLECTION,
+        points=[PointStruct(
+            id=_manifest_id(collection_name, source),
+            vector=[1.0],
+            payload={
+                "collection": collection_name,
+                "path": source,
+                "sha256": content_hash,
+                "chunk_ids": chunk_ids,
+                "ingested_at": datetime.utcnow().isoformat(),
+            },
+        )],
+    )
+
+
+def _delete_points(client: QdrantClient, collection_name: str, ids: list[str]) -> None:
+    if ids:
+        client.delete(collection_name=collection_name, points_selector=PointIdsList(points=ids))
+
+
+def sync_collection(client: QdrantClient, collection_name: str, files: list[Path], force: bool = False) -> bool:
+    """
+    Bring a collection in line with `files` using the manifest.
+
+    Returns:
+        True if anything in the collection changed
+    """
+    create_collection(client, collection_name, recreate=force)
+    manifest = {} if force else load_manifest(client, collection_name)
+    changed = False
+    total_chunks = 0
+
+    for file_path in files:
+        source = file_path.as_posix()
+        content_hash = file_sha256(file_path)
+        entry = manifest.pop(source, None)
+        if entry and entry["sha256"] == content_hash:
+            logger.info(f"Unchanged, skipping: {file_path.name}")
+            total_chunks += len(entry["chunk_ids"])
+            continue
+
+        # New chunks go in before old ones are removed, so searches never see a gap
+        chunk_ids, complete = ingest_document(file_path, collection_name, client, content_hash=content_hash)
+        if not complete:
+            # Keep the old chunks and record no hash, so the next sync ingests the file again
+            # and cleans up both the old and the partial chunks
+            logger.warning(f"Some chunks of {file_path.name} were not embedded; it will be retried")
+            old_ids = entry["chunk_ids"] if entry else []
+            _save_manifest_entry(client, collection_name, source, None, sorted(set(old_ids) | set(chunk_ids)))
+            total_chunks += len(chunk_ids)
+            changed = True
+            continue
+        if entry:
+            _delete_points(client, collection_name, sorted(set(entry["chunk_ids"]) - set(chunk_ids)))
+        _save_manifest_entry(client, collection_name, source, content_hash, chunk_ids)
+        total_chunks += len(chunk_ids)
+        changed = True
+
+    # Whatever is left in the manifest no longer exists on disk
+    for source, entry in manifest.items():
+        logger.info(f"Removed, deleting {len(entry['chunk_ids'])} chunks: {source}")
+        _delete_points(client, collection_name, entry["chunk_ids"])
+        client.delete(
+            collection_name=MANIFEST_COLLECTION,
+            points_selector=PointIdsList(points=[_manifest_id(collection_name, source)]),
+        )
+        changed = True
+
+    logger.info(f"{collection_name}: {total_chunks} chunks total")
+    return changed
+
+
+def _document_files(paths) -> list[Path]:
+    return sorted(p for p in paths if p.is_file() and p.suffix in SUPPORTED_SUFFIXES)
+
+
+def run(force: bool = False):
+    """
+    Main ingestion function.
+
+    Args:
+        force: Drop and rebuild every collection instead of syncing incrementally
+    """
     logger.info("Starting document ingestion...")
-    
+
     try:
         client = get_qdrant_client()
-        
-        # Ingest job descriptions
-        logger.info("\n=== Ingesting Job Descriptions ===")
-        create_collection(client, "job_descriptions")
+        create_collection(client, MANIFEST_COLLECTION, vector_size=1)
+
         jd_dir = SYSTEM_DOCS_PATH / "job_descriptions"
-        total_chunks = 0
-        if jd_dir.exists():
-            for file_path in jd_dir.glob("*"):
-                if file_path.is_file() and file_path.suffix in ['.txt', '.pdf']:
-                    total_chunks += ingest_document(file_path, "job_descriptions", client)
-        logger.info(f"Job descriptions: {total_chunks} chunks total")
-        
-        # Ingest case study brief
-        logger.info("\n=== Ingesting Case Study Brief ===")
-        create_collection(client, "case_study")
-        case_brief_files = list(SYSTEM_DOCS_PATH.glob("case_study_brief.*"))
-        total_chunks = 0
-        for file_path in case_brief_files:
-            if file_path.suffix in ['.txt', '.pdf']:
-                total_chunks += ingest_document(file_path, "case_study", client)
-        logger.info(f"Case study: {total_chunks} chunks total")
-        
-        # Ingest scoring rubrics
-        logger.info("\n=== Ingesting Scoring Rubrics ===")
-        create_collection(client, "scoring_rubrics")
-        rubric_files = list(SYSTEM_DOCS_PATH.glob("*_rubric.*"))
-        total_chunks = 0
-        for file_path in rubric_files:
-            if file_path.suffix in ['.txt', '.pdf']:
-                total_chunks += ingest_document(file_path, "scoring_rubrics", client)
-        logger.info(f"Scoring rubrics: {total_chunks} chunks total")
-        
+        sources = {
+            # Ingest job descriptions
+            "job_descriptions": _document_files(jd_dir.glob("*")) if jd_dir.exists() else [],
+            # Ingest case study brief
+            "case_study": _document_files(SYSTEM_DOCS_PATH.glob("case_study_brief.*")),
+            # Ingest scoring rubrics
+            "scoring_rubrics": _document_files(SYSTEM_DOCS_PATH.glob("*_rubric.*")),
+        }
+
+        changed = False
+        for collection_name, files in sources.items():
+            logger.info(f"\n=== Ingesting {collection_name} ===")
+            changed |= sync_collection(client, collection_name, files, force=force)
+
+        if changed or get_corpus_version(refresh=True) == 0:
+            bump_corpus_version()
         logger.info("\n=== Ingestion Complete ===")
         logger.info("All documents have been processed and stored in vector database")
-        
+
     except Exception as e:
         logger.error(f"Error during ingestion: {e}")
         raise
 
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    run(force="--force" in sys.argv[1:])
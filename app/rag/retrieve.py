@@ -3,27 +3,77 @@ RAG retrieval using Qdrant vector database.
 """
 from qdrant_client import QdrantClient
 from qdrant_client.http.exceptions import UnexpectedResponse
-from openai import OpenAI
+from qdrant_client.models import Distance, VectorParams, PointStruct
+from openai import BadRequestError, OpenAI
 from app.config import settings
+from app.rag.embedding_cache import get_embedding_cache
+from app.utils.metrics import EMBEDDING_REQUESTS, EMBEDDING_TEXTS, record_cache
+from app.llm import rate_limit
+from app.llm.rate_limit import estimate_tokens
+from collections import OrderedDict
+from threading import Lock
 from typing import List
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
 # Singleton client instances
 _qdrant_client: QdrantClient | None = None
+_qdrant_pid: int | None = None
 _openai_client: OpenAI | None = None
 
+# Bumped by ingestion whenever collection contents change; part of every
+# retrieval cache key so stale results are never served. The authoritative
+# value lives in the vector store so every process sharing it sees bumps.
+CORPUS_META_COLLECTION = "corpus_meta"
+_CORPUS_META_POINT_ID = "00000000-0000-0000-0000-000000000001"
+_corpus_version = 0
+_corpus_version_checked_at: float | None = None
+
+# (collection, query, top_k, corpus_version) -> concatenated context
+_retrieval_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_retrieval_cache_lock = Lock()
+retrieval_cache_stats = {"hits": 0, "misses": 0}
+
 
 def get_qdrant_client() -> QdrantClient:
-    """Get or create Qdrant client singleton."""
-    global _qdrant_client
-    if _qdrant_client is None:
-        _qdrant_client = QdrantClient(":memory:")  # Use in-memory for simplicity
-        logger.info("Initialized Qdrant client (in-memory)")
+    """
+    Get or create Qdrant client singleton.
+    
+    Uses the Qdrant server at settings.qdrant_url (gRPC, pooled) when set, an
+    embedded on-disk store at settings.qdrant_path when set (single process
+    only, the directory is locked), and an in-memory store otherwise.
+    """
+    global _qdrant_client, _qdrant_pid
+    # gRPC channels do not survive fork; Celery prefork children get their own
+    if _qdrant_client is None or _qdrant_pid != os.getpid():
+        if settings.qdrant_url:
+            _qdrant_client = QdrantClient(
+                url=settings.qdrant_url,
+                api_key=settings.qdrant_api_key,
+                prefer_grpc=settings.qdrant_prefer_grpc,
+                grpc_port=settings.qdrant_grpc_port,
+                pool_size=settings.qdrant_pool_size,
+                timeout=settings.qdrant_timeout,
+            )
+            logger.info(f"Initialized Qdrant client ({settings.qdrant_url}, grpc={settings.qdrant_prefer_grpc})")
+        elif settings.qdrant_path:
+            _qdrant_client = QdrantClient(path=settings.qdrant_path)
+            logger.info(f"Initialized Qdrant client (local, {settings.qdrant_path})")
+        else:
+            _qdrant_client = QdrantClient(":memory:")  # Use in-memory for simplicity
+            logger.info("Initialized Qdrant client (in-memory)")
+        _qdrant_pid = os.getpid()
     return _qdrant_client
 
 
+def vector_store_is_shared() -> bool:
+    """True when the vector store is a server shared by every process."""
+    return bool(settings.qdrant_url)
+
+
 def get_openai_client() -> OpenAI:
     """Get or create OpenAI client singleton."""
     global _openai_client
@@ -35,6 +85,10 @@ def get_openai_client() -> OpenAI:
     return _openai_client
 
 
+# Inputs are cut to this many characters before embedding (well under the 8191-token input limit)
+MAX_EMBEDDING_CHARS = 8000
+
+
 def get_embedding(text: str) -> List[float]:
     """
     Get embedding vector for text using OpenAI.
@@ -45,22 +99,163 @@ def get_embedding(text: str) -> List[float]:
     Returns:
         Embedding vector (1536 dimensions for text-embedding-3-small)
     """
+    text = text[:MAX_EMBEDDING_CHARS]  # Limit text length
+    cache = get_embedding_cache()
+    if cache:
+        cached = cache.get(settings.embedding_model, text)
+        if cached is not None:
+            return cached
     try:
         client = get_openai_client()
+        rate_limit.acquire(settings.embedding_model, estimate_tokens(text))
+        EMBEDDING_REQUESTS.labels(settings.embedding_model).inc()
+        EMBEDDING_TEXTS.labels(settings.embedding_model).inc()
         response = client.embeddings.create(
-            input=text[:8000],  # Limit text length
-            model="text-embedding-3-small"
+            input=text,
+            model=settings.embedding_model
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        if cache:
+            cache.put(settings.embedding_model, text, embedding)
+        return embedding
     except Exception as e:
         logger.error(f"Error getting embedding: {e}")
         raise
 
 
+def _batch_texts(texts: List[str], batch_size: int, max_tokens: int) -> List[List[int]]:
+    """Group text indices into batches bounded by item count and estimated tokens."""
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _embed_batch(texts: List[str]) -> List[List[float] | None]:
+    """
+    Embed one batch in a single request. If the API rejects the request (an
+    invalid input), the batch is split in half and retried so one bad input
+    only loses itself. Rate limits, timeouts and connection errors are not
+    the inputs' fault: they propagate after the OpenAI client's own retries
+    with backoff, instead of multiplying into more failing requests.
+    """
+    client = get_openai_client()
+    rate_limit.acquire(settings.embedding_model, sum(estimate_tokens(t) for t in texts))
+    EMBEDDING_REQUESTS.labels(settings.embedding_model).inc()
+    EMBEDDING_TEXTS.labels(settings.embedding_model).inc(len(texts))
+    try:
+        response = client.embeddings.create(input=texts, model=settings.embedding_model)
+        vectors: List[List[float] | None] = [None] * len(texts)
+        for item in response.data:
+            vectors[item.index] = item.embedding
+        return vectors
+    except BadRequestError as e:
+        if len(texts) == 1:
+            logger.error(f"Error getting embedding: {e}")
+            return [None]
+        logger.warning(f"Embedding batch of {len(texts)} failed, splitting: {e}")
+        mid = len(texts) // 2
+        return _embed_batch(texts[:mid]) + _embed_batch(texts[mid:])
+
+
+def get_embeddings(texts: List[str], batch_size: int | None = None) -> List[List[float] | None]:
+    """
+    Get embedding vectors for many texts using as few requests as possible.
+    
+    Args:
+        texts: Texts to embed
+        batch_size: Max inputs per request (defaults to settings.embedding_batch_size)
+    
+    Returns:
+        One vector per input, in order; None for inputs that could not be embedded
+    """
+    batch_size = batch_size or settings.embedding_batch_size
+    inputs = [t[:MAX_EMBEDDING_CHARS] for t in texts]
+    vectors: List[List[float] | None] = [None] * len(inputs)
+    
+    cache = get_embedding_cache()
+    if cache:
+        for i, vector in cache.get_many(settings.embedding_model, inputs).items():
+            vectors[i] = vector
+    
+    # Empty strings are rejected by the API, so they never join a batch
+    indices = [i for i, t in enumerate(inputs) if t.strip() and vectors[i] is None]
+    batches = _batch_texts([inputs[i] for i in indices], batch_size, settings.embedding_batch_max_tokens)
+    for batch in batches:
+        originals = [indices[j] for j in batch]
+        embedded = _embed_batch([inputs[i] for i in originals])
+        for i, vector in zip(originals, embedded):
+            vectors[i] = vector
+        if cache:
+            cache.put_many(settings.embedding_model, {
+                inputs[i]: v for i, v in zip(originals, embedded) if v is not None
+            })
+    
+    logger.info(f"Embedded {sum(v is not None for v in vectors)}/{len(texts)} texts in {len(batches)} requests")
+    return vectors
+
+
+def _read_corpus_version(client: QdrantClient) -> int:
+    if not client.collection_exists(CORPUS_META_COLLECTION):
+        return 0
+    points = client.retrieve(CORPUS_META_COLLECTION, ids=[_CORPUS_META_POINT_ID])
+    return int(points[0].payload.get("version", 0)) if points else 0
+
+
+def get_corpus_version(refresh: bool = False) -> int:
+    """
+    Current corpus version; 0 means nothing has been ingested yet.
+    
+    The stored value is re-read at most every corpus_version_refresh_seconds
+    unless `refresh` is set.
+    """
+    global _corpus_version, _corpus_version_checked_at
+    now = time.monotonic()
+    if (refresh or _corpus_version_checked_at is None
+            or now - _corpus_version_checked_at >= settings.corpus_version_refresh_seconds):
+        _corpus_version = _read_corpus_version(get_qdrant_client())
+        _corpus_version_checked_at = now
+    return _corpus_version
+
+
+def bump_corpus_version() -> int:
+    """Record that the corpus changed, invalidating cached retrieval results everywhere."""
+    global _corpus_version, _corpus_version_checked_at
+    client = get_qdrant_client()
+    version = _read_corpus_version(client) + 1
+    if not client.collection_exists(CORPUS_META_COLLECTION):
+        client.create_collection(
+            collection_name=CORPUS_META_COLLECTION,
+            vectors_config=VectorParams(size=1, distance=Distance.DOT)
+        )
+    client.upsert(
+        collection_name=CORPUS_META_COLLECTION,
+        points=[PointStruct(id=_CORPUS_META_POINT_ID, vector=[1.0], payload={"version": version})]
+    )
+    with _retrieval_cache_lock:
+        _corpus_version = version
+        _corpus_version_checked_at = time.monotonic()
+        _retrieval_cache.clear()
+    logger.info(f"Corpus version is now {version}")
+    return version
+
+
 def retrieve_context(query: str, collection: str, top_k: int = 3) -> str:
     """
     Retrieve relevant text chunks from vector database.
     
+    Results are memoized per (collection, query, top_k, corpus_version), so
+    repeated fixed queries skip both the embedding call and the vector search.
+    
     Args:
         query: Search query
         collection: Collection name to search
@@ -69,6 +264,16 @@ def retrieve_context(query: str, collection: str, top_k: int = 3) -> str:
     Returns:
         Concatenated text from top-k results
     """
+    key = (collection, query, top_k, get_corpus_version())
+    with _retrieval_cache_lock:
+        if key in _retrieval_cache:
+            _retrieval_cache.move_to_end(key)
+            retrieval_cache_stats["hits"] += 1
+            record_cache("retrieval", hits=1)
+            return _retrieval_cache[key]
+        retrieval_cache_stats["misses"] += 1
+    record_cache("retrieval", hits=0, misses=1)
+    
     try:
         client = get_qdrant_client()
         
@@ -90,6 +295,11 @@ def retrieve_context(query: str, collection: str, top_k: int = 3) -> str:
         
         combined = '\n\n'.join(contexts)
         logger.info(f"Retrieved {len(results)} chunks from {collection}, total {len(combined)} chars")
+        
+        with _retrieval_cache_lock:
+            _retrieval_cache[key] = combined
+            while len(_retrieval_cache) > settings.retrieval_cache_max_entries:
+                _retrieval_cache.popitem(last=False)
         return combined
         
     except UnexpectedResponse as e:
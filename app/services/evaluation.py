@@ -1,133 +1,375 @@
 ﻿from __future__ import annotations
 from sqlalchemy.orm import Session
-from app.persistence.repo import start_stage, end_stage, set_job_result, set_job_status
-from app.persistence.models import JobStatus, Job
-from app.utils.pdf import extract_text
-from app.llm.client import LLMClient
-from app.llm.cv_eval import evaluate_cv
-from app.llm.project_eval import evaluate_project
-from app.llm.final_agg import aggregate_results
-from app.rag.ingest import run as run_ingestion
-from app.rag.retrieve import check_collection_exists
+from app.persistence.recorder import StageRecorder
+from app.persistence.models import FileKind, JobStatus, Job
+from app.services.extraction import get_file_text
+from app.llm.client import LLMClient, AsyncLLMClient
+from app.llm.cv_eval import evaluate_cv, evaluate_cv_async
+from app.llm.project_eval import evaluate_project, evaluate_project_async
+from app.llm.final_agg import aggregate_results, write_summary, write_summary_async
+from app.llm.cascade import cascade, cascade_async
+from app.rag.ingest import file_sha256, run as run_ingestion
+from app.rag.retrieve import get_corpus_version, vector_store_is_shared
+from app.utils.redis_client import get_redis
+from app.services.stage_graph import StageGraph, CacheHit, Tiered
+from app.services.prescreen import prescreen, rejection_result
+from app.services.result_cache import evaluation_cache_key, lookup_cached_result, split_result
+from app.services.scoring import rubric_weights, weighted_score
+from app.utils.metrics import JOBS_FINISHED, JOBS_IN_FLIGHT, record_cache
+from app.config import settings
+from pathlib import Path
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+RAG_INGEST_LOCK = "rag:ingest"
+
 
 def ensure_rag_initialized():
-    """Ensure RAG system is initialized with documents."""
+    """
+    Ensure RAG system is initialized with documents.
+    
+    With a shared Qdrant server only one process ingests: the others block on
+    a Redis lock and find the corpus ready once it is released.
+    """
     try:
-        # Check if collections exist
-        if not check_collection_exists("job_descriptions"):
+        # A non-zero corpus version is only written once ingestion completed
+        if get_corpus_version(refresh=True) > 0:
+            logger.info("RAG already initialized")
+            return
+        if not vector_store_is_shared():
+            logger.info("RAG not initialized, running ingestion...")
+            run_ingestion()
+            return
+        with get_redis().lock(RAG_INGEST_LOCK, timeout=600, blocking_timeout=600):
+            if get_corpus_version(refresh=True) > 0:
+                logger.info("RAG initialized by another worker")
+                return
             logger.info("RAG not initialized, running ingestion...")
             run_ingestion()
-        else:
-            logger.info("RAG already initialized")
     except Exception as e:
         logger.warning(f"Could not initialize RAG: {e}")
         # Continue anyway - will use fallback
 
 
-def run_evaluation(db: Session, job: Job) -> dict:
+def _build_graph(recorder: StageRecorder, job: Job, llm_client: LLMClient | AsyncLLMClient) -> StageGraph:
     """
-    Complete LLM-powered evaluation pipeline with RAG.
-    
-    Pipeline stages:
+    Declare the pipeline stages and their dependencies:
     1. Parse CV and Project Report PDFs
+       (optional) Lexical pre-screen of the CV against the job descriptions (parse_cv)
     2. Initialize RAG system (if needed)
-    3. Evaluate CV against job description using LLM + RAG
-    4. Evaluate Project Report against case study brief using LLM + RAG
-    5. Aggregate results into final assessment using LLM
+    3. Look up a cached result for identical uploads                 (initialize_rag)
+    4. Evaluate CV against job description using LLM + RAG          (parse_cv, initialize_rag, cache_lookup)
+    5. Evaluate Project Report against case study brief using LLM + RAG
+                                                                     (parse_report, initialize_rag, cache_lookup)
+    6. Aggregate results into final scores from the rubric weights  (evaluate_cv, evaluate_project)
+       (the LLM writes the summary here only with FINAL_SUMMARY_MODE=eager)
+    
+    LLM stages are coroutines when given an AsyncLLMClient. On a cache hit they
+    return the cached outputs and are recorded as cache hits. Stage rows are
+    committed after the CV and project evaluations (the checkpoints worth
+    keeping); the rest are written with the final result. With the pre-screen
+    enabled, the LLM stages also depend on it and return a templated
+    rejection instead of calling the LLM when the CV falls below the threshold.
+    With the model cascade enabled, the CV and project evaluations try the
+    fast model first (see app.llm.cascade) and record the tier that answered.
     """
-    set_job_status(db, job.id, JobStatus.processing)
+    # Resolve ORM attributes up front; stages run on worker threads and
+    # must not trigger lazy loads on the shared session
+    job_id = job.id
+    cv_file_id, cv_path = job.cv_file_id, job.cv_file.path
+    report_file_id, report_path = job.report_file_id, job.report_file.path
+    cv_sha256, report_sha256 = job.cv_file.sha256, job.report_file.sha256
+    job_title = job.job_title
+    force_refresh = job.force_refresh
+    batch_id = job.batch_id
     
-    try:
-        # Stage 1: Parse CV
-        st1 = start_stage(db, job.id, "parse_cv")
-        logger.info(f"Job {job.id}: Parsing CV from {job.cv_file.path}")
-        cv_text = extract_text(job.cv_file.path)
-        if not cv_text.strip():
+    def parse_cv(_: dict) -> str:
+        logger.info(f"Job {job_id}: Parsing CV from {cv_path}")
+        text = get_file_text(cv_file_id, cv_path, FileKind.cv)
+        if not text.strip():
             raise Exception("CV is empty or could not be parsed")
-        end_stage(db, st1.id, logs=f"CV parsed: {len(cv_text)} characters\n")
-        
-        # Stage 2: Parse Project Report
-        st2 = start_stage(db, job.id, "parse_report")
-        logger.info(f"Job {job.id}: Parsing project report from {job.report_file.path}")
-        report_text = extract_text(job.report_file.path)
-        if not report_text.strip():
+        return text
+    
+    def parse_report(_: dict) -> str:
+        logger.info(f"Job {job_id}: Parsing project report from {report_path}")
+        text = get_file_text(report_file_id, report_path, FileKind.report)
+        if not text.strip():
             raise Exception("Project report is empty or could not be parsed")
-        end_stage(db, st2.id, logs=f"Report parsed: {len(report_text)} characters\n")
-        
-        # Stage 3: Initialize RAG (if needed)
-        st3 = start_stage(db, job.id, "initialize_rag")
+        return text
+    
+    def initialize_rag(_: dict) -> None:
         ensure_rag_initialized()
-        end_stage(db, st3.id, logs="RAG system ready\n")
+    
+    def upload_sha256(sha256: str | None, path: str) -> str | None:
+        # Files stored before uploads were hashed are hashed here
+        try:
+            return sha256 or file_sha256(Path(path))
+        except OSError as e:
+            logger.warning(f"Job {job_id}: cannot hash {path}, skipping the result cache: {e}")
+            return None
+    
+    def cache_lookup(deps: dict) -> dict:
+        cv_hash, report_hash = upload_sha256(cv_sha256, cv_path), upload_sha256(report_sha256, report_path)
+        if cv_hash is None or report_hash is None:
+            return {"key": None, "source_job_id": None, "result": None}
+        key = evaluation_cache_key(cv_hash, report_hash, job_title, get_corpus_version())
+        hit = None if force_refresh else lookup_cached_result(key)
+        if not force_refresh:
+            record_cache("evaluation", hits=int(hit is not None), misses=int(hit is None))
+        return {"key": key, "source_job_id": hit[0] if hit else None, "result": hit[1] if hit else None}
+    
+    def cached(deps: dict, part: int) -> CacheHit | None:
+        lookup = deps["cache_lookup"]
+        if not lookup["result"]:
+            return None
+        return CacheHit(split_result(lookup["result"])[part], source=f"job {lookup['source_job_id']}")
+    
+    def run_prescreen(deps: dict) -> dict:
+        return prescreen(deps["parse_cv"], job_title, settings.prescreen_threshold)
+    
+    def screened_out(deps: dict, part: int) -> dict | CacheHit | None:
+        """Cached output if any, else the templated rejection if the pre-screen rejected the CV."""
+        if hit := cached(deps, part):
+            return hit
+        screen = deps.get("prescreen")
+        if not screen or not screen["rejected"]:
+            return None
+        return split_result(rejection_result(screen))[part]
+    
+    if isinstance(llm_client, AsyncLLMClient):
+        async def run_cv_evaluation(deps: dict) -> dict | CacheHit | Tiered:
+            if hit := screened_out(deps, 0):
+                return hit
+            logger.info(f"Job {job_id}: Evaluating CV with LLM")
+            if settings.cascade_enabled:
+                return await cascade_async(
+                    lambda client: evaluate_cv_async(deps["parse_cv"], job_title, client, batch_id), "cv", llm_client
+                )
+            return await evaluate_cv_async(deps["parse_cv"], job_title, llm_client, batch_id)
+        
+        async def run_project_evaluation(deps: dict) -> dict | CacheHit | Tiered:
+            if hit := screened_out(deps, 1):
+                return hit
+            logger.info(f"Job {job_id}: Evaluating project report with LLM")
+            if settings.cascade_enabled:
+                return await cascade_async(
+                    lambda client: evaluate_project_async(deps["parse_report"], client), "project", llm_client
+                )
+            return await evaluate_project_async(deps["parse_report"], llm_client)
+        
+        async def run_final_aggregation(deps: dict) -> dict | CacheHit:
+            if hit := screened_out(deps, 2):
+                return hit
+            logger.info(f"Job {job_id}: Generating final assessment")
+            final = aggregate_results(deps["evaluate_cv"], deps["evaluate_project"])
+            if settings.final_summary_mode == "eager":
+                final["overall_summary"] = await write_summary_async(
+                    deps["evaluate_cv"], deps["evaluate_project"], final, job_title, llm_client
+                )
+            return final
+    else:
+        def run_cv_evaluation(deps: dict) -> dict | CacheHit | Tiered:
+            if hit := screened_out(deps, 0):
+                return hit
+            logger.info(f"Job {job_id}: Evaluating CV with LLM")
+            if settings.cascade_enabled:
+                return cascade(
+                    lambda client: evaluate_cv(deps["parse_cv"], job_title, client, batch_id), "cv", llm_client
+                )
+            return evaluate_cv(deps["parse_cv"], job_title, llm_client, batch_id)
+        
+        def run_project_evaluation(deps: dict) -> dict | CacheHit | Tiered:
+            if hit := screened_out(deps, 1):
+                return hit
+            logger.info(f"Job {job_id}: Evaluating project report with LLM")
+            if settings.cascade_enabled:
+                return cascade(lambda client: evaluate_project(deps["parse_report"], client), "project", llm_client)
+            return evaluate_project(deps["parse_report"], llm_client)
         
+        def run_final_aggregation(deps: dict) -> dict | CacheHit:
+            if hit := screened_out(deps, 2):
+                return hit
+            logger.info(f"Job {job_id}: Generating final assessment")
+            final = aggregate_results(deps["evaluate_cv"], deps["evaluate_project"])
+            if settings.final_summary_mode == "eager":
+                final["overall_summary"] = write_summary(
+                    deps["evaluate_cv"], deps["evaluate_project"], final, job_title, llm_client
+                )
+            return final
+    
+    graph = StageGraph(recorder, max_workers=settings.pipeline_max_workers)
+    graph.add("parse_cv", parse_cv,
+              describe=lambda t: f"CV parsed: {len(t)} characters\n")
+    graph.add("parse_report", parse_report,
+              describe=lambda t: f"Report parsed: {len(t)} characters\n")
+    # The vector store may be process-local, so RAG setup is never checkpointed; the LLM
+    # stages retrieve from it and depend on it directly, so a resumed job runs it again
+    graph.add("initialize_rag", initialize_rag,
+              describe=lambda _: "RAG system ready\n", checkpoint=False)
+    graph.add("cache_lookup", cache_lookup, deps=("initialize_rag",),
+              describe=lambda r: f"Cache hit: job {r['source_job_id']}\n" if r["result"] else "Cache miss\n")
+    screen_deps: tuple[str, ...] = ()
+    if settings.prescreen_enabled:
+        graph.add("prescreen", run_prescreen, deps=("parse_cv",),
+                  describe=lambda r: f"Lexical relevance {r['score']:.3f} (threshold {r['threshold']:.3f})"
+                                     f"{': rejected' if r['rejected'] else ''}\n")
+        screen_deps = ("prescreen",)
+    graph.add("evaluate_cv", run_cv_evaluation, deps=("parse_cv", "initialize_rag", "cache_lookup", *screen_deps),
+              describe=_describe_cv, flush=True)
+    graph.add("evaluate_project", run_project_evaluation,
+              deps=("parse_report", "initialize_rag", "cache_lookup", *screen_deps),
+              describe=_describe_project, flush=True)
+    graph.add("final_aggregation", run_final_aggregation,
+              deps=("evaluate_cv", "evaluate_project", "cache_lookup", *screen_deps),
+              describe=lambda r: f"Overall Score: {r.get('overall_score', 0):.2f}/5 ({r.get('recommendation')})\n")
+    return graph
+
+
+def _describe_cv(r: dict) -> str:
+    # The rubric-weighted score is what the result stores; the model's own rate only as a fallback
+    score = weighted_score(r, rubric_weights()["cv"])
+    if score is None:
+        return f"CV Match Rate: {r.get('cv_match_rate') or 0:.2f} (model-reported)\n"
+    return f"CV Score: {score:.2f}/5 (rubric-weighted)\n"
+
+
+def _describe_project(r: dict) -> str:
+    score = weighted_score(r, rubric_weights()["project"])
+    if score is None:
+        return f"Project Score: {r.get('project_score') or 0:.2f}/5 (model-reported)\n"
+    return f"Project Score: {score:.2f}/5 (rubric-weighted)\n"
+
+
+def _combine_results(outputs: dict) -> dict:
+    cv_result = outputs["evaluate_cv"]
+    project_result = outputs["evaluate_project"]
+    final_result = outputs["final_aggregation"]
+    # Prefer the rubric-weighted scores over the model's own arithmetic, as rescoring does
+    scoring = final_result.get("scoring", {})
+    
+    result = {
+        "cv_match_rate": round(scoring["cv_weighted_score"] / 5, 2) if scoring else cv_result.get("cv_match_rate", 0),
+        "cv_feedback": cv_result.get("cv_feedback", ""),
+        "project_score": scoring.get("project_weighted_score", project_result.get("project_score", 0)),
+        "project_feedback": project_result.get("project_feedback", ""),
+        "overall_score": final_result.get("overall_score", 0),
+        # None until the LLM has written it (see FINAL_SUMMARY_MODE)
+        "overall_summary": final_result.get("overall_summary"),
+        "recommendation": final_result.get("recommendation", ""),
+        "scoring": final_result.get("scoring", {}),
+        # Include detailed breakdowns
+        "cv_details": {
+            "technical_skills": cv_result.get("technical_skills", {}),
+            "experience_level": cv_result.get("experience_level", {}),
+            "achievements": cv_result.get("achievements", {}),
+            "cultural_fit": cv_result.get("cultural_fit", {})
+        },
+        "project_details": {
+            "correctness": project_result.get("correctness", {}),
+            "code_quality": project_result.get("code_quality", {}),
+            "resilience": project_result.get("resilience", {}),
+            "documentation": project_result.get("documentation", {}),
+            "creativity": project_result.get("creativity", {})
+        }
+    }
+    if "prescreen" in outputs:
+        result["prescreen"] = outputs["prescreen"]
+    return result
+
+
+def _cache_key(outputs: dict) -> str | None:
+    """Key to store the result under; templated pre-screen rejections are not reused."""
+    if (outputs.get("prescreen") or {}).get("rejected"):
+        # The key does not cover the pre-screen settings, and a rejection costs no LLM call
+        return None
+    return outputs["cache_lookup"]["key"]
+
+
+def _complete(recorder: StageRecorder, result: dict, cache_key: str | None = None) -> None:
+    logger.info(f"Job {recorder.job_id}: Evaluation complete")
+    recorder.finish(JobStatus.completed, result, cache_key=cache_key)
+    JOBS_FINISHED.labels("completed").inc()
+
+
+def _fail(recorder: StageRecorder, e: Exception) -> None:
+    logger.error(f"Job {recorder.job_id}: Evaluation failed: {e}")
+    # Store error in result
+    error_result = {
+        "error": str(e),
+        "cv_match_rate": 0,
+        "cv_feedback": f"Evaluation failed: {e}",
+        "project_score": 0,
+        "project_feedback": f"Evaluation failed: {e}",
+        "overall_score": 0,
+        "overall_summary": f"Evaluation could not be completed due to an error: {e}"
+    }
+    recorder.finish(JobStatus.failed, error_result)
+    JOBS_FINISHED.labels("failed").inc()
+
+
+def _requeue(recorder: StageRecorder, e: Exception) -> None:
+    # Not terminal: the worker runs the job again, resuming from the committed checkpoints
+    logger.warning(f"Job {recorder.job_id}: Evaluation attempt failed, will be retried: {e}")
+    recorder.set_status(JobStatus.queued)
+
+
+def run_evaluation(db: Session, job: Job, final_attempt: bool = True) -> dict:
+    """
+    Complete LLM-powered evaluation pipeline with RAG.
+    
+    Stages run as a dependency graph (see _build_graph), independent branches
+    concurrently. Finished stages are checkpointed, so a retried job resumes
+    where it failed. A failure marks the job failed only on the final attempt;
+    before that the job goes back to queued for the worker's retry.
+    """
+    recorder = StageRecorder(db, job.id)
+    recorder.set_status(JobStatus.processing)
+    
+    try:
+        JOBS_IN_FLIGHT.inc()
         # Initialize LLM client
         llm_client = LLMClient()
         if not llm_client.available():
             raise Exception("LLM client not available. Please configure OPENAI_API_KEY.")
         
-        # Stage 4: Evaluate CV with LLM + RAG
-        st4 = start_stage(db, job.id, "evaluate_cv")
-        logger.info(f"Job {job.id}: Evaluating CV with LLM")
-        cv_result = evaluate_cv(cv_text, job.job_title, llm_client)
-        end_stage(db, st4.id, logs=f"CV Match Rate: {cv_result.get('cv_match_rate', 0):.2f}\n")
-        
-        # Stage 5: Evaluate Project with LLM + RAG
-        st5 = start_stage(db, job.id, "evaluate_project")
-        logger.info(f"Job {job.id}: Evaluating project report with LLM")
-        project_result = evaluate_project(report_text, llm_client)
-        end_stage(db, st5.id, logs=f"Project Score: {project_result.get('project_score', 0):.2f}/5\n")
-        
-        # Stage 6: Final aggregation with LLM
-        st6 = start_stage(db, job.id, "final_aggregation")
-        logger.info(f"Job {job.id}: Generating final assessment")
-        final_result = aggregate_results(cv_result, project_result, job.job_title, llm_client)
-        end_stage(db, st6.id, logs=f"Overall Score: {final_result.get('overall_score', 0):.2f}/5\n")
+        outputs = _build_graph(recorder, job, llm_client).run()
+        result = _combine_results(outputs)
+        _complete(recorder, result, cache_key=_cache_key(outputs))
+        return result
         
-        # Combine all results
-        result = {
-            "cv_match_rate": cv_result.get("cv_match_rate", 0),
-            "cv_feedback": cv_result.get("cv_feedback", ""),
-            "project_score": project_result.get("project_score", 0),
-            "project_feedback": project_result.get("project_feedback", ""),
-            "overall_score": final_result.get("overall_score", 0),
-            "overall_summary": final_result.get("overall_summary", ""),
-            "recommendation": final_result.get("recommendation", ""),
-            # Include detailed breakdowns
-            "cv_details": {
-                "technical_skills": cv_result.get("technical_skills", {}),
-                "experience_level": cv_result.get("experience_level", {}),
-                "achievements": cv_result.get("achievements", {}),
-                "cultural_fit": cv_result.get("cultural_fit", {})
-            },
-            "project_details": {
-                "correctness": project_result.get("correctness", {}),
-                "code_quality": project_result.get("code_quality", {}),
-                "resilience": project_result.get("resilience", {}),
-                "documentation": project_result.get("documentation", {}),
-                "creativity": project_result.get("creativity", {})
-            }
-        }
+    except Exception as e:
+        (_fail if final_attempt else _requeue)(recorder, e)
+        raise
+    finally:
+        JOBS_IN_FLIGHT.dec()
+
+
+async def run_evaluation_async(db: Session, job: Job, llm_client: AsyncLLMClient,
+                               final_attempt: bool = True) -> dict:
+    """
+    Asyncio version of run_evaluation for the async worker.
+    
+    LLM calls are awaited on the event loop through the shared AsyncLLMClient;
+    database work and PDF parsing run in threads so the loop never blocks.
+    """
+    recorder = StageRecorder(db, job.id)
+    await asyncio.to_thread(recorder.set_status, JobStatus.processing)
+    
+    try:
+        JOBS_IN_FLIGHT.inc()
+        if not llm_client.available():
+            raise Exception("LLM client not available. Please configure OPENAI_API_KEY.")
         
-        logger.info(f"Job {job.id}: Evaluation complete")
-        set_job_result(db, job.id, result)
-        set_job_status(db, job.id, JobStatus.completed)
+        graph = await asyncio.to_thread(_build_graph, recorder, job, llm_client)
+        outputs = await graph.run_async()
+        result = _combine_results(outputs)
+        await asyncio.to_thread(_complete, recorder, result, _cache_key(outputs))
         return result
         
     except Exception as e:
-        logger.error(f"Job {job.id}: Evaluation failed: {e}")
-        set_job_status(db, job.id, JobStatus.failed)
-        # Store error in result
-        error_result = {
-            "error": str(e),
-            "cv_match_rate": 0,
-            "cv_feedback": f"Evaluation failed: {e}",
-            "project_score": 0,
-            "project_feedback": f"Evaluation failed: {e}",
-            "overall_score": 0,
-            "overall_summary": f"Evaluation could not be completed due to an error: {e}"
-        }
-        set_job_result(db, job.id, error_result)
-        raise
\ No newline at end of file
+        await asyncio.to_thread(_fail if final_attempt else _requeue, recorder, e)
+        raise
+    finally:
+        JOBS_IN_FLIGHT.dec()
@@ -0,0 +1,104 @@
+﻿"""
+Upload-time PDF text extraction.
+
+Parsing a PDF is CPU-bound, so it is started as soon as `/upload` returns, in
+a small process pool, and the text is stored in `file_texts`. The parse
+stages of an evaluation then only read that row; they extract inline only if
+the background extraction has not finished (or the API process restarted).
+
+Only as much of a document as the evaluation prompts use is extracted (see
+`text_budget`); stored text marked truncated is re-extracted if the budget
+is later raised.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import logging
+import multiprocessing
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import settings
+from app.persistence.db import SessionLocal
+from app.persistence.models import FileKind, FileText
+from app.persistence.repo import get_file_text as load_file_text, save_file_text
+from app.utils.pdf import extract_with_stats
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and DB pool is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.pdf_extract_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def text_budget(kind: FileKind) -> int:
+    """Characters of a document of this kind the evaluation prompts use."""
+    return settings.cv_max_chars if kind == FileKind.cv else settings.report_max_chars
+
+
+def _usable(ft: FileText | None, max_chars: int) -> bool:
+    return ft is not None and (not ft.truncated or len(ft.text) >= max_chars)
+
+
+def _store(file_id: str, text: str, page_count: int, truncated: bool, extraction_ms: float) -> None:
+    with SessionLocal() as db:
+        save_file_text(db, file_id, text, page_count, extraction_ms, truncated=truncated)
+
+
+def _try_store(file_id: str, text: str, page_count: int, truncated: bool, extraction_ms: float) -> None:
+    """Best-effort `_store`: the background extraction may insert the same row concurrently."""
+    with SessionLocal() as db:
+        try:
+            save_file_text(db, file_id, text, page_count, extraction_ms, truncated=truncated)
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.warning(f"Could not store extracted text for file {file_id}: {e}")
+
+
+def _has_text(file_id: str, max_chars: int) -> bool:
+    with SessionLocal() as db:
+        return _usable(load_file_text(db, file_id), max_chars)
+
+
+async def extract_and_store(file_id: str, path: str, kind: FileKind) -> None:
+    """Extract a file's text in the process pool and persist it (no-op if already stored)."""
+    max_chars = text_budget(kind)
+    try:
+        if await asyncio.to_thread(_has_text, file_id, max_chars):
+            return
+        loop = asyncio.get_running_loop()
+        text, pages, truncated, ms = await loop.run_in_executor(_get_pool(), extract_with_stats, path, max_chars)
+        await asyncio.to_thread(_store, file_id, text, pages, truncated, ms)
+        logger.info(f"Extracted {pages} pages from {path} in {ms:.0f}ms")
+    except Exception as e:
+        # The parse stage extracts inline when no text was stored
+        logger.warning(f"Background extraction failed for file {file_id}: {e}")
+
+
+def get_file_text(file_id: str, path: str, kind: FileKind) -> str:
+    """Stored text of a file, extracting (and storing) it inline if missing."""
+    max_chars = text_budget(kind)
+    # Own session: this runs on a stage thread, not the pipeline's session
+    with SessionLocal() as db:
+        ft = load_file_text(db, file_id)
+        if _usable(ft, max_chars):
+            return ft.text[:max_chars]
+    text, pages, truncated, ms = extract_with_stats(path, max_chars)
+    logger.info(f"Extracted {pages} pages from {path} inline in {ms:.0f}ms")
+    if text.strip():
+        _try_store(file_id, text, pages, truncated, ms)
+    return text
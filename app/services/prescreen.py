@@ -0,0 +1,146 @@
+"""
+Lexical pre-screen of CVs against the job descriptions.
+
+Before any LLM call, a CV is scored by TF-IDF cosine similarity against the
+job description in data/system_docs/job_descriptions for the job's title:
+the one whose heading and file name best match the title. A title that
+matches no description falls back to the best match over all of them.
+Inverse document frequencies come from the descriptions' paragraphs, so
+boilerplate words that appear everywhere weigh little and role-specific
+terms weigh a lot. CVs scoring below `settings.prescreen_threshold` get a
+templated rejection instead of the CV, project and final LLM stages.
+
+Use benchmarks/prescreen_harness.py to choose the threshold from stored
+results before enabling it.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from app.services.scoring import _tokenize
+from collections import Counter
+import numpy as np
+import re
+
+JD_DIR = Path("data/system_docs/job_descriptions")
+
+# Function words carry no relevance signal but would match every CV
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our that the their this to was we
+were will with you your i my me he she they them his her who what which when where how not but
+""".split())
+
+REJECTION_FEEDBACK = (
+    "The CV has little overlap with the job description (lexical relevance {score:.3f}, "
+    "pre-screen threshold {threshold:.3f}), so it was not evaluated in detail."
+)
+
+
+def _terms(text: str) -> list[str]:
+    return [t for t in _tokenize(text) if t not in STOPWORDS]
+
+
+def _tfidf(texts: list[str], vocabulary: dict[str, int], idf: np.ndarray) -> np.ndarray:
+    """
+    (texts, vocabulary) sublinear TF-IDF rows, L2-normalized.
+
+    Terms outside the vocabulary have no column but still count towards a
+    row's norm (at the highest IDF), so a CV is not made to look relevant by
+    dropping everything the descriptions do not mention.
+    """
+    counts = np.zeros((len(texts), len(vocabulary)))
+    unknown_sq = np.zeros(len(texts))
+    unknown_idf = idf.max(initial=1.0)
+    for i, text in enumerate(texts):
+        unknown = Counter()
+        for term in _terms(text):
+            j = vocabulary.get(term)
+            if j is None:
+                unknown[term] += 1
+            else:
+                counts[i, j] += 1
+        unknown_sq[i] = sum((np.log1p(c) * unknown_idf) ** 2 for c in unknown.values())
+    weights = np.log1p(counts) * idf
+    norms = np.sqrt((weights ** 2).sum(axis=1) + unknown_sq)[:, None]
+    return np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+
+
+@dataclass(frozen=True)
+class JDIndex:
+    """TF-IDF vectors of the job descriptions over their shared vocabulary."""
+    vocabulary: dict[str, int]
+    idf: np.ndarray
+    # (descriptions, vocabulary), rows L2-normalized
+    vectors: np.ndarray
+    # Same shape, over each description's heading and file name only
+    headings: np.ndarray
+    names: tuple[str, ...]
+
+    def select(self, job_title: str) -> int | None:
+        """Row of the description whose heading best matches `job_title`, or None if none does."""
+        similarity = _tfidf([job_title], self.vocabulary, self.idf)[0] @ self.headings.T
+        return int(similarity.argmax()) if similarity.max(initial=0.0) > 0 else None
+
+    def scores(self, texts: list[str], job_title: str | None = None) -> np.ndarray:
+        """
+        Cosine similarity (0-1) of each text against the description for
+        `job_title`, or the best over all descriptions if none matches it.
+        """
+        if not texts:
+            return np.zeros(0)
+        row = self.select(job_title) if job_title else None
+        vectors = self.vectors if row is None else self.vectors[[row]]
+        return (_tfidf(texts, self.vocabulary, self.idf) @ vectors.T).max(axis=1).round(4)
+
+
+@lru_cache(maxsize=2)
+def _build_index(files: tuple[tuple[str, float], ...]) -> JDIndex:
+    docs = {Path(path).stem: Path(path).read_text(encoding="utf-8") for path, _mtime in files}
+    if not docs:
+        raise ValueError(f"No job descriptions found in {JD_DIR}")
+    paragraphs = [terms for text in docs.values() for p in re.split(r"\n\s*\n", text) if (terms := _terms(p))]
+    vocabulary: dict[str, int] = {}
+    for terms in paragraphs:
+        for term in terms:
+            vocabulary.setdefault(term, len(vocabulary))
+    # Document frequency of each term over paragraphs, smoothed as in scikit-learn
+    df = np.zeros(len(vocabulary))
+    for terms in paragraphs:
+        df[[vocabulary[t] for t in set(terms)]] += 1
+    idf = np.log((1 + len(paragraphs)) / (1 + df)) + 1
+    headings = [f"{name.replace('_', ' ')}\n{next((line for line in text.splitlines() if line.strip()), '')}"
+                for name, text in docs.items()]
+    return JDIndex(vocabulary=vocabulary, idf=idf, vectors=_tfidf(list(docs.values()), vocabulary, idf),
+                   headings=_tfidf(headings, vocabulary, idf), names=tuple(docs))
+
+
+def jd_index() -> JDIndex:
+    """Index of the current job descriptions, rebuilt when a file changes."""
+    files = tuple((str(p), p.stat().st_mtime) for p in sorted(JD_DIR.glob("*.txt")))
+    return _build_index(files)
+
+
+def prescreen(cv_text: str, job_title: str, threshold: float) -> dict:
+    """Stage output: lexical relevance of a CV to the job and whether it falls below `threshold`."""
+    index = jd_index()
+    row = index.select(job_title)
+    score = float(index.scores([cv_text], job_title)[0])
+    return {"score": score, "threshold": threshold, "rejected": score < threshold,
+            "job_description": index.names[row] if row is not None else None}
+
+
+def rejection_result(screen: dict) -> dict:
+    """Templated job result for a CV rejected by the pre-screen (no LLM calls)."""
+    feedback = REJECTION_FEEDBACK.format(**screen)
+    return {
+        # Lowest rubric score on every CV parameter, as a 0-1 rate
+        "cv_match_rate": 0.2,
+        "cv_feedback": feedback,
+        "project_score": None,
+        "project_feedback": "Not evaluated: the CV did not pass the pre-screen.",
+        "overall_score": 1.0,
+        "overall_summary": feedback,
+        "recommendation": "not recommended",
+        "cv_details": {},
+        "project_details": {},
+    }
@@ -0,0 +1,164 @@
+"""
+Bulk rescoring of completed jobs after the rubric weights change.
+
+The per-parameter scores the LLM gave are stored in each job's result
+(`cv_details`, `project_details`), so new weights only need arithmetic:
+completed jobs are streamed from the database with a server-side cursor in
+chunks, each chunk is scored as NumPy matrices, and the results that changed
+are written back with one executemany UPDATE per chunk. No LLM calls are made.
+
+    python -m app.services.rescoring [--job-title TITLE] [--batch-size N] [--dry-run]
+"""
+from __future__ import annotations
+from sqlalchemy import select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.persistence.db import engine as default_engine
+from app.persistence.models import Job, JobStatus
+from app.services.response_cache import invalidate_result_responses
+from app.services.scoring import RECOMMENDATION_BANDS, rubric_weights
+from time import perf_counter
+import argparse
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_BAND_FLOORS = np.array([lowest for lowest, _ in RECOMMENDATION_BANDS])
+_BAND_NAMES = np.array([band for _, band in RECOMMENDATION_BANDS], dtype=object)
+
+
+def _score_matrix(results: list[dict], details_key: str, params: list[str]) -> np.ndarray:
+    """(rows, params) scores, NaN where a score is missing or not a number."""
+    scores = np.full((len(results), len(params)), np.nan)
+    for i, result in enumerate(results):
+        details = result.get(details_key) or {}
+        for j, param in enumerate(params):
+            score = (details.get(param) or {}).get("score")
+            if isinstance(score, (int, float)) and not isinstance(score, bool):
+                scores[i, j] = score
+    return scores
+
+
+def _weighted(scores: np.ndarray, weights: dict[str, float], fallback: np.ndarray) -> np.ndarray:
+    """Row-wise weighted average on the 1-5 scale; rows with a missing score keep `fallback`."""
+    weighted = np.clip(scores, 1.0, 5.0) @ np.array(list(weights.values()))
+    return np.where(np.isnan(weighted), fallback, weighted).round(2)
+
+
+def rescore(results: list[dict], weights: dict[str, dict[str, float]], cv_weight: float) -> dict[str, np.ndarray]:
+    """
+    Vectorized counterpart of `scoring.compute_final_scores` over many stored results.
+
+    Args:
+        results: Job results as stored in `Job.result_json`
+        weights: Rubric weights from `scoring.rubric_weights()`
+        cv_weight: Share of the overall score taken from the CV
+
+    Returns:
+        Arrays (one value per result) of cv_weighted_score, project_weighted_score,
+        cv_match_rate, project_score, overall_score and recommendation
+    """
+    cv_fallback = np.array([float(r.get("cv_match_rate") or 0) * 5 for r in results])
+    project_fallback = np.array([float(r.get("project_score") or 0) for r in results])
+    cv_score = _weighted(_score_matrix(results, "cv_details", list(weights["cv"])), weights["cv"], cv_fallback)
+    project_score = _weighted(
+        _score_matrix(results, "project_details", list(weights["project"])), weights["project"], project_fallback
+    )
+    overall = (cv_weight * cv_score + (1 - cv_weight) * project_score).round(2)
+    # Index of the first (highest) band whose floor the score reaches
+    band = np.argmax(overall[:, None] >= _BAND_FLOORS[None, :], axis=1)
+    return {
+        "cv_weighted_score": cv_score,
+        "project_weighted_score": project_score,
+        "cv_match_rate": (cv_score / 5).round(2),
+        "project_score": project_score,
+        "overall_score": overall,
+        "recommendation": _BAND_NAMES[band],
+    }
+
+
+def _updated_result(result: dict, scores: dict[str, np.ndarray], i: int, cv_weight: float) -> dict | None:
+    """The result with row i's new scores, or None if nothing changed."""
+    values = {
+        "cv_match_rate": float(scores["cv_match_rate"][i]),
+        "project_score": float(scores["project_score"][i]),
+        "overall_score": float(scores["overall_score"][i]),
+        "recommendation": str(scores["recommendation"][i]),
+        "scoring": {
+            "cv_weighted_score": float(scores["cv_weighted_score"][i]),
+            "project_weighted_score": float(scores["project_weighted_score"][i]),
+            "cv_weight": cv_weight,
+        },
+    }
+    if all(result.get(key) == value for key, value in values.items()):
+        return None
+    updated = {**result, **values}
+    if values["recommendation"] != result.get("recommendation"):
+        # The narrative explains the old recommendation; drop it so it is rewritten on demand
+        updated["overall_summary"] = None
+    return updated
+
+
+def rescore_jobs(bind: Engine | None = None, job_title: str | None = None, batch_size: int | None = None,
+                 dry_run: bool = False) -> dict:
+    """
+    Recompute the scores of every completed job from the current rubric weights.
+
+    Args:
+        bind: Engine to use (defaults to the application's)
+        job_title: Only rescore jobs for this title
+        batch_size: Rows fetched, scored and written per chunk
+        dry_run: Count the jobs whose scores would change without writing them
+
+    Returns:
+        dict with scanned, updated (or would-be updated) and seconds
+    """
+    bind = bind or default_engine
+    batch_size = batch_size or settings.rescore_batch_size
+    weights = rubric_weights()
+    cv_weight = settings.final_cv_weight
+
+    query = select(Job.id, Job.result_json).where(Job.status == JobStatus.completed)
+    if job_title is not None:
+        query = query.where(Job.job_title == job_title)
+
+    started = perf_counter()
+    scanned = updated = 0
+    # Rows stream over one connection while updates commit on another
+    with bind.connect() as reader, Session(bind=bind) as writer:
+        rows = reader.execution_options(yield_per=batch_size).execute(query)
+        for chunk in rows.partitions():
+            # Failed jobs and pre-screen rejections have no parameter scores to reweigh
+            chunk = [(job_id, result) for job_id, result in chunk
+                     if result and "error" not in result and not (result.get("prescreen") or {}).get("rejected")]
+            scanned += len(chunk)
+            if not chunk:
+                continue
+            scores = rescore([result for _, result in chunk], weights, cv_weight)
+            changes = []
+            for i, (job_id, result) in enumerate(chunk):
+                new_result = _updated_result(result, scores, i, cv_weight)
+                if new_result is not None:
+                    changes.append({"id": job_id, "result_json": new_result})
+            updated += len(changes)
+            if changes and not dry_run:
+                writer.execute(update(Job), changes)
+                writer.commit()
+                invalidate_result_responses([change["id"] for change in changes])
+
+    seconds = round(perf_counter() - started, 3)
+    logger.info(f"Rescoring {'(dry run) ' if dry_run else ''}scanned {scanned} jobs, "
+                f"{updated} changed in {seconds}s")
+    return {"scanned": scanned, "updated": updated, "seconds": seconds, "dry_run": dry_run}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rescore completed jobs with the current rubric weights")
+    parser.add_argument("--job-title", default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    print(rescore_jobs(job_title=args.job_title, batch_size=args.batch_size, dry_run=args.dry_run))
@@ -0,0 +1,143 @@
+"""
+Read-through Redis cache of completed `/result` responses.
+
+A completed job's result does not change, so once it has been read from
+the database its response body and ETag are kept in Redis and later polls
+never touch the database. Anything that rewrites a completed result must
+call `invalidate_result_response`.
+
+Invalidation also bumps a per-job version. Readers take the version with
+their cache lookup, before reading the database, and the body is cached only
+if the version is unchanged; otherwise a rewrite committed after the read
+could be overwritten in Redis by the stale body.
+"""
+from __future__ import annotations
+from app.config import settings
+from app.utils.redis_client import get_redis, get_async_redis
+from app.utils.metrics import record_cache
+import json
+import logging
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+# Caches the response only if no invalidation happened since the version was read
+_CACHE_IF_CURRENT_LUA = """
+local current = redis.call('GET', KEYS[2]) or '0'
+if current ~= ARGV[3] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+return 1
+"""
+
+
+def _key(job_id: str) -> str:
+    return f"result:{job_id}"
+
+
+def _version_key(job_id: str) -> str:
+    return f"result:{job_id}:version"
+
+
+def _decode(raw: list[bytes | None]) -> tuple[tuple[dict, str] | None, str]:
+    body, version = raw
+    version = version.decode() if version is not None else "0"
+    if body is None:
+        record_cache("result_response", hits=0, misses=1)
+        return None, version
+    record_cache("result_response", hits=1)
+    cached = json.loads(body)
+    return (cached["body"], cached["etag"]), version
+
+
+def _encode(body: dict, etag: str) -> str:
+    return json.dumps({"body": body, "etag": etag})
+
+
+def get_result_response(job_id: str) -> tuple[tuple[dict, str] | None, str | None]:
+    """
+    ((response body, ETag) if cached, version) of a job.
+
+    Pass the version to `cache_result_response` after reading the job; it is
+    None if Redis is unavailable.
+    """
+    try:
+        return _decode(get_redis().mget(_key(job_id), _version_key(job_id)))
+    except redis.RedisError as e:
+        logger.warning(f"Result cache unavailable: {e}")
+        return None, None
+
+
+async def get_result_response_async(job_id: str) -> tuple[tuple[dict, str] | None, str | None]:
+    """Async version of `get_result_response` for the API's event loop."""
+    try:
+        return _decode(await get_async_redis().mget(_key(job_id), _version_key(job_id)))
+    except redis.RedisError as e:
+        logger.warning(f"Result cache unavailable: {e}")
+        return None, None
+
+
+def _cache_args(job_id: str, body: dict, etag: str, version: str) -> dict:
+    return {"keys": [_key(job_id), _version_key(job_id)],
+            "args": [_encode(body, etag), settings.result_cache_ttl_seconds, version]}
+
+
+def cache_result_response(job_id: str, body: dict, etag: str, version: str | None) -> None:
+    """Cache a job's response unless it was invalidated since `version` was read."""
+    if version is None:
+        return
+    try:
+        client = get_redis()
+        client.register_script(_CACHE_IF_CURRENT_LUA)(**_cache_args(job_id, body, etag, version))
+    except redis.RedisError as e:
+        logger.warning(f"Could not cache result of job {job_id}: {e}")
+
+
+async def cache_result_response_async(job_id: str, body: dict, etag: str, version: str | None) -> None:
+    if version is None:
+        return
+    try:
+        client = get_async_redis()
+        await client.register_script(_CACHE_IF_CURRENT_LUA)(**_cache_args(job_id, body, etag, version))
+    except redis.RedisError as e:
+        logger.warning(f"Could not cache result of job {job_id}: {e}")
+
+
+def _invalidate(pipe, job_ids: list[str]) -> None:
+    pipe.delete(*(_key(job_id) for job_id in job_ids))
+    for job_id in job_ids:
+        pipe.incr(_version_key(job_id))
+        # Outlives any request that read the old version
+        pipe.expire(_version_key(job_id), settings.result_cache_ttl_seconds)
+
+
+def invalidate_result_response(job_id: str) -> None:
+    try:
+        with get_redis().pipeline() as pipe:
+            _invalidate(pipe, [job_id])
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate cached result of job {job_id}: {e}")
+
+
+def invalidate_result_responses(job_ids: list[str]) -> None:
+    """Invalidate many cached results with one round-trip."""
+    if not job_ids:
+        return
+    try:
+        with get_redis().pipeline() as pipe:
+            _invalidate(pipe, job_ids)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate {len(job_ids)} cached results: {e}")
+
+
+async def invalidate_result_response_async(job_id: str) -> None:
+    try:
+        async with get_async_redis().pipeline() as pipe:
+            _invalidate(pipe, [job_id])
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Could not invalidate cached result of job {job_id}: {e}")
@@ -0,0 +1,64 @@
+"""
+Evaluation-level result cache.
+
+Candidates re-apply and recruiters re-submit, so identical CV/report pairs are
+often evaluated again for the same job title. A completed job stores a hash of
+everything that determines its result; a later job with the same hash copies
+that result instead of making the LLM calls again. Documents are identified by
+the sha256 of the uploaded file, so the lookup does not wait for text
+extraction and the CV and report branches of the pipeline stay independent.
+"""
+from __future__ import annotations
+from app.config import settings
+from app.llm.prompts import PROMPT_VERSION
+from app.persistence.db import SessionLocal
+from app.persistence.repo import find_cached_result
+import hashlib
+import json
+
+
+def evaluation_cache_key(cv_sha256: str, report_sha256: str, job_title: str, corpus_version: int) -> str:
+    """Hash of the inputs an evaluation result depends on."""
+    parts = {
+        "cv": cv_sha256,
+        "report": report_sha256,
+        # The text sent to the LLM is the extracted file cut at these budgets
+        "cv_max_chars": settings.cv_max_chars,
+        "report_max_chars": settings.report_max_chars,
+        "job_title": " ".join(job_title.split()).casefold(),
+        "prompt_version": PROMPT_VERSION,
+        "corpus_version": corpus_version,
+        # Answers of another model, or of the cascade's fast tier, are not reused after a config change
+        "model": settings.openai_model,
+        "cascade": [settings.cascade_fast_model, settings.cascade_borderline_min,
+                    settings.cascade_borderline_max] if settings.cascade_enabled else None,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def lookup_cached_result(cache_key: str) -> tuple[str, dict] | None:
+    """(source job id, result) of the latest completed job with this key, if any."""
+    # Own session: this runs on a stage thread, not the pipeline's session
+    with SessionLocal() as db:
+        return find_cached_result(db, cache_key)
+
+
+def split_result(result: dict) -> tuple[dict, dict, dict]:
+    """Split a stored job result back into (cv, project, final aggregation) stage outputs."""
+    cv = {
+        "cv_match_rate": result.get("cv_match_rate", 0),
+        "cv_feedback": result.get("cv_feedback", ""),
+        **result.get("cv_details", {}),
+    }
+    project = {
+        "project_score": result.get("project_score", 0),
+        "project_feedback": result.get("project_feedback", ""),
+        **result.get("project_details", {}),
+    }
+    final = {
+        "overall_score": result.get("overall_score", 0),
+        "overall_summary": result.get("overall_summary"),
+        "recommendation": result.get("recommendation", ""),
+        "scoring": result.get("scoring", {}),
+    }
+    return cv, project, final
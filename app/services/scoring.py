@@ -1,5 +1,40 @@
 ﻿import re
 from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+RUBRIC_DIR = Path("data/system_docs")
+
+# Result keys of each rubric's parameters, matched to the rubric's
+# "Parameter: <name> (Weight: N%)" lines by name prefix
+RUBRIC_PARAMETERS = {
+    "cv": {
+        "technical_skills": "technical skills",
+        "experience_level": "experience level",
+        "achievements": "relevant achievements",
+        "cultural_fit": "cultural",
+    },
+    "project": {
+        "correctness": "correctness",
+        "code_quality": "code quality",
+        "resilience": "resilience",
+        "documentation": "documentation",
+        "creativity": "creativity",
+    },
+}
+
+# Lowest overall score (1-5) of each recommendation band, best first
+RECOMMENDATION_BANDS = (
+    (4.0, "strong fit"),
+    (3.0, "moderate fit"),
+    (2.0, "needs development"),
+    (0.0, "not recommended"),
+)
+
+_PARAMETER_RE = re.compile(r"^Parameter:\s*(.+?)\s*\(Weight:\s*([\d.]+)\s*%\)", re.MULTILINE)
 
 def _tokenize(s: str) -> list[str]:
     tokens = re.findall(r"[a-zA-Z0-9_+#.]+", s.lower())
@@ -22,4 +57,76 @@ def bounded_to_scale(val: float, lo: float = 0.0, hi: float = 1.0, scale: int =
         return 0
     r = (val - lo) / (hi - lo)
     r = min(max(r, 0.0), 1.0)
-    return round(1 + r * (scale - 1), 2)  # 1..5
\ No newline at end of file
+    return round(1 + r * (scale - 1), 2)  # 1..5
+
+def parse_rubric_weights(text: str, parameters: dict[str, str]) -> dict[str, float]:
+    """Weights (summing to 1) of a rubric's parameters, keyed by result key.
+    Raises ValueError if a parameter has no weight in the rubric.
+    """
+    declared = [(name.lower(), float(weight)) for name, weight in _PARAMETER_RE.findall(text)]
+    weights = {}
+    for key, label in parameters.items():
+        match = next((w for name, w in declared if name.startswith(label)), None)
+        if match is None:
+            raise ValueError(f"Rubric has no weight for parameter '{label}'")
+        weights[key] = match
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Rubric weights sum to zero")
+    return {key: w / total for key, w in weights.items()}
+
+@lru_cache(maxsize=4)
+def _load_rubric_weights(files: tuple[tuple[str, float], ...]) -> dict[str, dict[str, float]]:
+    weights = {}
+    for path, _mtime in files:
+        name = Path(path).stem.removesuffix("_rubric").removesuffix("_scoring")
+        if name in RUBRIC_PARAMETERS:
+            weights[name] = parse_rubric_weights(Path(path).read_text(encoding="utf-8"), RUBRIC_PARAMETERS[name])
+    missing = set(RUBRIC_PARAMETERS) - set(weights)
+    if missing:
+        raise ValueError(f"Missing rubric files for: {', '.join(sorted(missing))}")
+    return weights
+
+def rubric_weights() -> dict[str, dict[str, float]]:
+    """Parameter weights of every rubric in data/system_docs/*_rubric.txt, keyed by "cv"/"project".
+    Cached per file modification time, so edited rubrics apply without a restart.
+    """
+    files = tuple((str(p), p.stat().st_mtime) for p in sorted(RUBRIC_DIR.glob("*_rubric.txt")))
+    return _load_rubric_weights(files)
+
+def weighted_score(details: dict, weights: dict[str, float]) -> float | None:
+    """Weighted average (1-5) of per-parameter scores, or None if any score is missing."""
+    total = 0.0
+    for key, weight in weights.items():
+        score = (details.get(key) or {}).get("score")
+        if not isinstance(score, (int, float)) or isinstance(score, bool):
+            return None
+        total += min(max(float(score), 1.0), 5.0) * weight
+    return round(total, 2)
+
+def recommendation_for(score: float) -> str:
+    for lowest, band in RECOMMENDATION_BANDS:
+        if score >= lowest:
+            return band
+    return RECOMMENDATION_BANDS[-1][1]
+
+def compute_final_scores(cv_result: dict, project_result: dict, cv_weight: float) -> dict:
+    """Overall score (1-5) and recommendation computed from the per-parameter scores.
+    Falls back to the model's own aggregate for a side whose parameter scores are incomplete.
+    """
+    weights = rubric_weights()
+    cv_score = weighted_score(cv_result, weights["cv"])
+    if cv_score is None:
+        logger.warning("CV parameter scores incomplete, using the model's cv_match_rate")
+        cv_score = round(float(cv_result.get("cv_match_rate") or 0) * 5, 2)
+    project_score = weighted_score(project_result, weights["project"])
+    if project_score is None:
+        logger.warning("Project parameter scores incomplete, using the model's project_score")
+        project_score = float(project_result.get("project_score") or 0)
+    overall = round(cv_weight * cv_score + (1 - cv_weight) * project_score, 2)
+    return {
+        "overall_score": overall,
+        "recommendation": recommendation_for(overall),
+        "cv_weighted_score": cv_score,
+        "project_weighted_score": project_score,
+    }
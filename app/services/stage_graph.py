@@ -0,0 +1,223 @@
+﻿"""
+Small dependency-graph executor for the evaluation pipeline.
+
+Stages declare the stages they depend on; every stage whose dependencies are
+satisfied is started immediately, so independent branches (e.g. CV and
+project evaluation) run concurrently. Each stage still gets its own `Stage`
+row with accurate start/end timestamps.
+
+Stage outputs are checkpointed on their `Stage` row. When a job is retried,
+checkpointed stages that already finished are restored from the database
+instead of being executed again, so a failing final step does not re-pay for
+the parse and LLM stages before it. Stage rows are written through a
+`StageRecorder` and only committed after stages registered with `flush=True`
+(the expensive ones); cheap stages finished since the last flush simply run
+again on a retry. LLM calls a stage makes are captured (see app.llm.usage)
+and stored on its row as `usage_json`; stages answered by one tier of a
+model cascade return `Tiered` so the tier is recorded as well.
+
+`run()` executes stages on a thread pool; `run_async()` executes them as
+asyncio tasks (coroutine stage functions are awaited, plain ones run in a
+thread), which lets one event loop drive many jobs at once.
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import asyncio
+import inspect
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable
+from app.llm.usage import capture_usage
+from app.persistence.models import Stage
+from app.persistence.recorder import StageRecorder
+from app.utils.metrics import STAGE_DURATION
+from time import perf_counter
+import logging
+
+logger = logging.getLogger(__name__)
+
+StageFn = Callable[[dict[str, Any]], Any]
+
+
+@dataclass(frozen=True)
+class StageSpec:
+    name: str
+    fn: StageFn
+    deps: tuple[str, ...] = ()
+    describe: Callable[[Any], str] | None = None
+    checkpoint: bool = True
+    flush: bool = False
+
+
+@dataclass(frozen=True)
+class CacheHit:
+    """Return this from a stage function when its output came from a cache rather than real work."""
+    value: Any
+    source: str = ""
+
+
+@dataclass(frozen=True)
+class Tiered:
+    """Return this from a stage function to record which model tier produced its output."""
+    value: Any
+    tier: str
+    note: str = ""
+
+
+class StageGraph:
+    """
+    Run named stages in dependency order, concurrently where possible.
+
+    Each stage function receives a dict mapping its dependency names to their
+    outputs and returns its own output. `describe` turns that output into the
+    text stored in `Stage.logs`. Outputs of stages registered with
+    `checkpoint=True` must be JSON-serializable; stages with side effects that
+    have to happen in every process (e.g. warming a local cache) should pass
+    `checkpoint=False` so they always run. Stages registered with `flush=True`
+    commit every buffered stage row when they finish.
+    """
+
+    def __init__(self, recorder: StageRecorder, max_workers: int = 4) -> None:
+        self.recorder = recorder
+        self.job_id = recorder.job_id
+        self.max_workers = max_workers
+        self._stages: dict[str, StageSpec] = {}
+        # A SQLAlchemy session is not thread-safe; serialize stage bookkeeping
+        self._db_lock = Lock()
+
+    def add(
+        self,
+        name: str,
+        fn: StageFn,
+        deps: tuple[str, ...] = (),
+        describe: Callable[[Any], str] | None = None,
+        checkpoint: bool = True,
+        flush: bool = False,
+    ) -> None:
+        """Register a stage. Dependencies must be registered first, which keeps the graph acyclic."""
+        if name in self._stages:
+            raise ValueError(f"Stage {name} already registered")
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self._stages[name] = StageSpec(
+            name=name, fn=fn, deps=tuple(deps), describe=describe, checkpoint=checkpoint, flush=flush
+        )
+
+    def _start(self, spec: StageSpec) -> Stage:
+        with self._db_lock:
+            st = self.recorder.start(spec.name)
+        logger.info(f"Job {self.job_id}: stage {spec.name} started")
+        return st
+
+    def _finish(self, spec: StageSpec, st: Stage, value: Any, seconds: float, usage: list[dict]) -> Any:
+        """Record the stage as ended and return its (unwrapped) output."""
+        cache_hit = isinstance(value, CacheHit)
+        STAGE_DURATION.labels(spec.name, str(cache_hit).lower()).observe(seconds)
+        logs = f"Cache hit ({value.source})\n" if cache_hit else ""
+        if cache_hit:
+            value = value.value
+        tier = None
+        if isinstance(value, Tiered):
+            tier = value.tier
+            logs += f"Model tier: {tier}{f' ({value.note})' if value.note else ''}\n"
+            value = value.value
+        if spec.describe:
+            logs += spec.describe(value)
+        output = {"value": value} if spec.checkpoint else None
+        with self._db_lock:
+            self.recorder.end(st, logs=logs or None, output=output, cache_hit=cache_hit, usage=usage,
+                              model_tier=tier)
+            if spec.flush:
+                self.recorder.flush()
+        logger.info(f"Job {self.job_id}: stage {spec.name} finished{' (cache hit)' if cache_hit else ''}")
+        return value
+
+    def _run_stage(self, spec: StageSpec, inputs: dict[str, Any]) -> Any:
+        st = self._start(spec)
+        started = perf_counter()
+        with capture_usage() as usage:
+            value = spec.fn(inputs)
+        return self._finish(spec, st, value, perf_counter() - started, usage)
+
+    async def _run_stage_async(self, spec: StageSpec, inputs: dict[str, Any]) -> Any:
+        st = await asyncio.to_thread(self._start, spec)
+        started = perf_counter()
+        # to_thread copies the context, so calls made in the thread land in the same sink
+        with capture_usage() as usage:
+            if inspect.iscoroutinefunction(spec.fn):
+                value = await spec.fn(inputs)
+            else:
+                value = await asyncio.to_thread(spec.fn, inputs)
+        return await asyncio.to_thread(self._finish, spec, st, value, perf_counter() - started, usage)
+
+    def _restore(self) -> tuple[dict[str, Any], dict[str, StageSpec]]:
+        """Load checkpointed outputs; returns (results so far, stages still to run)."""
+        results: dict[str, Any] = {}
+        pending = dict(self._stages)
+
+        with self._db_lock:
+            checkpoints = self.recorder.checkpoints()
+        for name, spec in self._stages.items():
+            if spec.checkpoint and name in checkpoints:
+                results[name] = checkpoints[name]["value"]
+                del pending[name]
+                logger.info(f"Job {self.job_id}: stage {name} restored from checkpoint")
+        # Side-effect-only stages are pointless once everything downstream is restored
+        for name, spec in list(pending.items()):
+            dependents = [s.name for s in self._stages.values() if name in s.deps]
+            if not spec.checkpoint and dependents and all(d in results for d in dependents):
+                del pending[name]
+        return results, pending
+
+    @staticmethod
+    def _ready(pending: dict[str, StageSpec], results: dict[str, Any]):
+        """Yield (spec, inputs) for pending stages whose dependencies are done, removing them."""
+        for name, spec in list(pending.items()):
+            if all(dep in results for dep in spec.deps):
+                del pending[name]
+                yield spec, {dep: results[dep] for dep in spec.deps}
+
+    def run(self) -> dict[str, Any]:
+        """
+        Execute all stages and return their outputs keyed by stage name.
+
+        The first stage failure is re-raised once the stages already in flight
+        have finished; stages depending on the failed one are never started.
+        """
+        results, pending = self._restore()
+        running: dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                for spec, inputs in self._ready(pending, results):
+                    running[pool.submit(self._run_stage, spec, inputs)] = spec.name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    results[name] = fut.result()
+
+        return results
+
+    async def run_async(self) -> dict[str, Any]:
+        """Asyncio version of `run()` with the same failure semantics."""
+        results, pending = await asyncio.to_thread(self._restore)
+        running: dict[asyncio.Task, str] = {}
+
+        try:
+            while pending or running:
+                for spec, inputs in self._ready(pending, results):
+                    running[asyncio.create_task(self._run_stage_async(spec, inputs))] = spec.name
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    results[name] = task.result()
+        except BaseException:
+            # Let stages already in flight finish so the session is not used after we return
+            if running:
+                await asyncio.wait(running)
+            raise
+
+        return results
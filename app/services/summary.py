@@ -0,0 +1,119 @@
+"""
+Narrative summaries written after the evaluation.
+
+Scores and recommendations are computed without the LLM, so unless
+FINAL_SUMMARY_MODE=eager a job completes without a summary. It is written by
+the API instead, the first time the result is read (lazy mode) or when
+requested through POST /result/{job_id}/summary, and stored in the job's
+result. A Redis in-flight marker (SET NX) makes sure only one summary per
+job is being written at a time: GET /result claims it before scheduling the
+background write, so polling a job does not queue one LLM call per request.
+After a failed attempt the marker is kept for SUMMARY_RETRY_SECONDS, so a
+failing model is not called again by every poll.
+"""
+from __future__ import annotations
+from app.llm.client import AsyncLLMClient
+from app.llm.final_agg import write_summary_async
+from app.persistence.db import AsyncSessionLocal
+from app.persistence.async_repo import get_job, update_job_result
+from app.persistence.models import JobStatus
+from app.services.response_cache import invalidate_result_response_async
+from app.services.result_cache import split_result
+from app.utils.redis_client import get_async_redis
+import logging
+import redis
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_LOCK_SECONDS = 120
+SUMMARY_RETRY_SECONDS = 30
+
+
+def _lock_key(job_id: str) -> str:
+    return f"summary:{job_id}:lock"
+
+
+def summary_missing(result: dict | None) -> bool:
+    """True for a successful result whose summary has not been written yet."""
+    return bool(result) and "error" not in result and not result.get("overall_summary")
+
+
+async def claim_summary(job_id: str, fail_open: bool = False) -> bool:
+    """
+    Mark the job's summary as being written; False if it already is.
+    
+    Without Redis, `fail_open` callers (an explicit request) proceed and risk
+    a duplicate call; the rest (polling readers) do not start one.
+    """
+    try:
+        return bool(await get_async_redis().set(_lock_key(job_id), 1, nx=True, ex=SUMMARY_LOCK_SECONDS))
+    except redis.RedisError as e:
+        logger.warning(f"Summary lock unavailable: {e}")
+        return fail_open
+
+
+async def _release(job_id: str, retry_after: int | None = None) -> None:
+    """Drop the marker, or keep it `retry_after` seconds to hold back the next attempt."""
+    try:
+        if retry_after:
+            await get_async_redis().expire(_lock_key(job_id), retry_after)
+        else:
+            await get_async_redis().delete(_lock_key(job_id))
+    except redis.RedisError as e:
+        logger.warning(f"Could not release summary lock of job {job_id}: {e}")
+
+
+async def ensure_summary(job_id: str, claimed: bool = False) -> str | None:
+    """
+    Write and store the summary of a completed job unless it already has one.
+    
+    Args:
+        job_id: Job to summarize
+        claimed: The caller already holds the marker from `claim_summary`
+    
+    Returns:
+        The summary, or None if the job is not completed or another request
+        is writing it (or failed to, moments ago)
+    """
+    async with AsyncSessionLocal() as db:
+        if not claimed:
+            job = await get_job(db, job_id)
+            if not job or job.status != JobStatus.completed:
+                return None
+            if not summary_missing(job.result_json):
+                return job.result_json.get("overall_summary")
+            if not await claim_summary(job_id, fail_open=True):
+                return None
+        try:
+            # Read again under the marker: another writer may have finished in between
+            db.expire_all()
+            job = await get_job(db, job_id)
+            result = job.result_json if job and job.status == JobStatus.completed else None
+            if not summary_missing(result):
+                await _release(job_id)
+                return (result or {}).get("overall_summary")
+            cv, project, final = split_result(result)
+            read_at = job.updated_at
+            summary = await write_summary_async(cv, project, final, job.job_title, AsyncLLMClient())
+            # A rescore or re-evaluation committed during the LLM call wins: this summary
+            # describes the old scores, so it is dropped and the next read writes a new one
+            if not await update_job_result(db, job_id, {**result, "overall_summary": summary},
+                                           expected_updated_at=read_at):
+                await _release(job_id)
+                logger.info(f"Job {job_id}: result changed while summarizing, summary discarded")
+                return None
+        except BaseException:
+            await _release(job_id, retry_after=SUMMARY_RETRY_SECONDS)
+            raise
+        await _release(job_id)
+    await invalidate_result_response_async(job_id)
+    logger.info(f"Job {job_id}: summary written")
+    return summary
+
+
+async def write_summary_in_background(job_id: str) -> None:
+    """`ensure_summary` for a marker claimed by the reader; failures are logged and retried later."""
+    try:
+        await ensure_summary(job_id, claimed=True)
+    except Exception as e:
+        logger.error(f"Job {job_id}: could not write summary: {e}")
@@ -0,0 +1,48 @@
+"""
+Job progress events over Redis pub/sub.
+
+`StageRecorder` (app/persistence/recorder.py) publishes an event whenever a
+stage starts or ends and when a job's status changes; `/result/{job_id}/events` relays them to clients as
+Server-Sent Events, so the frontend no longer has to poll.
+"""
+from __future__ import annotations
+from datetime import datetime
+from app.utils.redis_client import get_redis
+import json
+import logging
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+def job_channel(job_id: str) -> str:
+    return f"job:{job_id}:events"
+
+
+def _iso(ts: datetime | None) -> str | None:
+    return ts.isoformat() if ts else None
+
+
+def stage_event(stage) -> dict:
+    """Event payload describing a Stage row (started, or finished once ended_at is set)."""
+    return {
+        "type": "stage",
+        "stage": stage.name,
+        "state": "finished" if stage.ended_at else "started",
+        "started_at": _iso(stage.started_at),
+        "ended_at": _iso(stage.ended_at),
+        "cache_hit": bool(stage.cache_hit),
+        "model_tier": stage.model_tier,
+    }
+
+
+def status_event(job_id: str, status: str) -> dict:
+    return {"type": "status", "job_id": job_id, "status": status}
+
+
+def publish_job_event(job_id: str, event: dict) -> None:
+    """Publish an event for a job. Best effort: progress streaming must never fail a job."""
+    try:
+        get_redis().publish(job_channel(job_id), json.dumps(event))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish event for job {job_id}: {e}")
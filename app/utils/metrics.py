@@ -0,0 +1,135 @@
+"""
+Prometheus metrics for the API and the workers.
+
+The API serves them at `/metrics`; workers expose them on
+`settings.worker_metrics_port`. Celery's prefork children each have their own
+registry, so when PROMETHEUS_MULTIPROC_DIR is set (required for the Celery
+worker, see README) values are written to that directory and aggregated at
+scrape time.
+"""
+from __future__ import annotations
+from time import perf_counter
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, multiprocess, start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from app.config import settings
+from app.llm.usage import record_call
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    # Value files are created lazily by each process, but the directory must exist
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# LLM calls and pipeline stages take seconds to minutes
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+STAGE_DURATION = Histogram(
+    "evaluator_stage_duration_seconds", "Pipeline stage duration",
+    ["stage", "cache_hit"], buckets=_SLOW_BUCKETS,
+)
+LLM_REQUEST_DURATION = Histogram(
+    "evaluator_llm_request_duration_seconds", "OpenAI chat completion latency",
+    ["model", "outcome"], buckets=_SLOW_BUCKETS,
+)
+LLM_TOKENS = Counter("evaluator_llm_tokens_total", "Tokens reported in response.usage", ["model", "kind"])
+LLM_RETRIES = Counter("evaluator_llm_retries_total", "OpenAI calls retried after an error", ["model"])
+EMBEDDING_REQUESTS = Counter("evaluator_embedding_requests_total", "Embedding API requests", ["model"])
+EMBEDDING_TEXTS = Counter("evaluator_embedding_texts_total", "Texts sent to the embedding API", ["model"])
+CACHE_LOOKUPS = Counter(
+    "evaluator_cache_lookups_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"],
+)
+JOBS_IN_FLIGHT = Gauge("evaluator_jobs_in_flight", "Evaluations currently running", multiprocess_mode="livesum")
+JOBS_FINISHED = Counter("evaluator_jobs_finished_total", "Evaluations finished by status", ["status"])
+
+
+def record_cache(cache: str, hits: int, misses: int = 0) -> None:
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+class LLMCallTimer:
+    """
+    Times one OpenAI request and records its token usage: `with LLMCallTimer(model) as call: ...`.
+
+    Besides the Prometheus metrics, the attempt is passed to the per-call usage sink (see app.llm.usage).
+    """
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.usage = None
+
+    def __enter__(self) -> LLMCallTimer:
+        self.start = perf_counter()
+        return self
+
+    def record(self, response) -> None:
+        self.usage = getattr(response, "usage", None)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        seconds = perf_counter() - self.start
+        outcome = "error" if exc_type else "ok"
+        LLM_REQUEST_DURATION.labels(self.model, outcome).observe(seconds)
+        if self.usage is not None:
+            LLM_TOKENS.labels(self.model, "prompt").inc(self.usage.prompt_tokens or 0)
+            LLM_TOKENS.labels(self.model, "completion").inc(self.usage.completion_tokens or 0)
+        record_call(self.model, self.usage, seconds, error=exc_type.__name__ if exc_type else None)
+
+
+def count_llm_retry(retry_state) -> None:
+    """tenacity `before_sleep` hook for LLM client methods."""
+    LLM_RETRIES.labels(getattr(retry_state.args[0], "model", "unknown")).inc()
+
+
+class QueueDepthCollector:
+    """Reads the job queue lengths from Redis at scrape time."""
+
+    def describe(self):
+        # Nothing to pre-declare; keeps registration from querying Redis
+        return []
+
+    def collect(self):
+        from app.utils.redis_client import get_redis
+        gauge = GaugeMetricFamily("evaluator_queue_depth", "Jobs waiting in the queue", labels=["queue"])
+        for queue in ("celery", settings.async_queue_name):
+            try:
+                gauge.add_metric([queue], get_redis().llen(queue))
+            except Exception as e:
+                logger.warning(f"Could not read depth of queue {queue}: {e}")
+        yield gauge
+
+
+def _multiprocess() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def build_registry(include_queue_depth: bool = False) -> CollectorRegistry:
+    """Registry to expose: aggregated over processes in multiprocess mode, else the default one."""
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    if include_queue_depth:
+        registry.register(QueueDepthCollector())
+    return registry
+
+
+def start_metrics_server(port: int) -> None:
+    """Serve this process's (or, in multiprocess mode, all worker processes') metrics over HTTP."""
+    try:
+        start_http_server(port, registry=build_registry())
+        logger.info(f"Metrics server listening on :{port}")
+    except OSError as e:
+        logger.warning(f"Could not start metrics server on :{port}: {e}")
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker child's live gauges (multiprocess mode only)."""
+    if _multiprocess():
+        multiprocess.mark_process_dead(pid)
@@ -1,21 +1,67 @@
 ﻿from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+import time
 
-def extract_text(path: str) -> str:
-    """Extract text from a PDF using PyMuPDF, fallback to pdfminer if needed."""
-    p = Path(path)
-    if not p.exists():
+def _pdfminer_page(path: str, index: int) -> str:
+    try:
+        from pdfminer.high_level import extract_text as pm_extract
+        return pm_extract(path, page_numbers=[index]) or ""
+    except Exception:
         return ""
+
+def _iter_pages_pdfminer(path: str) -> Iterator[str]:
+    try:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+        for layout in extract_pages(path):
+            yield "".join(el.get_text() for el in layout if isinstance(el, LTTextContainer))
+    except Exception:
+        return
+
+def iter_pages(path: str) -> Iterator[str]:
+    """
+    Yield the text of each page lazily, in order.
+
+    PyMuPDF is preferred; pdfminer is only used for pages PyMuPDF fails on,
+    or for the whole document if PyMuPDF cannot open it.
+    """
+    if not Path(path).exists():
+        return
     try:
         import fitz  # PyMuPDF
-        text_parts = []
-        with fitz.open(path) as doc:
-            for page in doc:
-                text_parts.append(page.get_text("text"))
-        return "\n".join(text_parts)
+        doc = fitz.open(path)
     except Exception:
-        try:
-            from pdfminer.high_level import extract_text as pm_extract
-            return pm_extract(path) or ""
-        except Exception:
-            return ""
\ No newline at end of file
+        yield from _iter_pages_pdfminer(path)
+        return
+    with doc:
+        for i in range(doc.page_count):
+            try:
+                yield doc.load_page(i).get_text("text")
+            except Exception:
+                yield _pdfminer_page(path, i)
+
+def extract_document(path: str, max_chars: Optional[int] = None) -> tuple[str, int, bool]:
+    """
+    Extract (text, pages read, truncated) from a PDF.
+
+    With `max_chars`, pages stop being parsed once the budget is met, so only
+    the part of a long document that will actually be used is ever loaded.
+    """
+    parts = []
+    size = 0
+    for page_text in iter_pages(path):
+        parts.append(page_text)
+        size += len(page_text) + 1
+        if max_chars is not None and size > max_chars:
+            return "\n".join(parts)[:max_chars], len(parts), True
+    return "\n".join(parts), len(parts), False
+
+def extract_text(path: str, max_chars: Optional[int] = None) -> str:
+    """Extract text from a PDF using PyMuPDF, fallback to pdfminer if needed."""
+    return extract_document(path, max_chars)[0]
+
+def extract_with_stats(path: str, max_chars: Optional[int] = None) -> tuple[str, int, bool, float]:
+    """(text, pages read, truncated, extraction time in ms). Top-level so it can run in a process pool."""
+    start = time.perf_counter()
+    text, pages, truncated = extract_document(path, max_chars)
+    return text, pages, truncated, round((time.perf_counter() - start) * 1000, 1)
@@ -0,0 +1,26 @@
+﻿"""
+Shared Redis connection (the same Redis Celery uses as broker).
+"""
+from app.config import settings
+import redis
+import redis.asyncio
+
+_redis: redis.Redis | None = None
+_async_redis: redis.asyncio.Redis | None = None
+
+
+def get_redis() -> redis.Redis:
+    """Get or create the process-wide Redis client singleton."""
+    global _redis
+    if _redis is None:
+        # redis-py's connection pool resets itself after fork, so one client per process is enough
+        _redis = redis.Redis.from_url(settings.redis_url)
+    return _redis
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """Get or create the asyncio Redis client used by the API's streaming endpoints."""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = redis.asyncio.Redis.from_url(settings.redis_url)
+    return _async_redis
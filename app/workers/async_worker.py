@@ -0,0 +1,93 @@
+"""
+Asyncio evaluation worker.
+
+Runs many evaluation jobs concurrently on one event loop, sharing a single
+pooled AsyncLLMClient. Because jobs spend nearly all their time waiting on
+the OpenAI API, one of these processes replaces dozens of prefork children.
+
+Jobs are taken from the Redis list settings.async_queue_name, which the API
+fills when WORKER_MODE=async. Delivery is at-most-once: a job popped by a
+worker that then crashes stays in `processing` and must be re-submitted.
+
+Usage:
+    python -m app.workers.async_worker
+"""
+from app.config import settings
+from app.llm.client import AsyncLLMClient
+from app.persistence.db import SessionLocal
+from app.persistence.repo import get_job
+from app.persistence.models import JobStatus
+from app.services.evaluation import run_evaluation_async, ensure_rag_initialized
+from app.utils.metrics import start_metrics_server
+import asyncio
+import logging
+import signal
+import redis.asyncio as aioredis
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Same retry budget as the Celery task; finished stages are restored from checkpoints
+MAX_ATTEMPTS = 4
+
+
+async def process_job(job_id: str, llm_client: AsyncLLMClient) -> None:
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        db = SessionLocal()
+        try:
+            job = await asyncio.to_thread(get_job, db, job_id)
+            if not job:
+                logger.warning(f"Job {job_id} not found")
+                return
+            if job.status == JobStatus.completed:
+                return
+            await run_evaluation_async(db, job, llm_client, final_attempt=attempt == MAX_ATTEMPTS)
+            return
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS:
+                logger.error(f"Job {job_id}: giving up after {attempt} attempts: {e}")
+                return
+            delay = 2 ** attempt
+            logger.warning(f"Job {job_id}: attempt {attempt} failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+        finally:
+            await asyncio.to_thread(db.close)
+
+
+async def main() -> None:
+    llm_client = AsyncLLMClient()
+    queue = aioredis.Redis.from_url(settings.redis_url)
+    slots = asyncio.Semaphore(settings.async_worker_concurrency)
+    in_flight: set[asyncio.Task] = set()
+    stopping = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    start_metrics_server(settings.worker_metrics_port)
+    await asyncio.to_thread(ensure_rag_initialized)
+    logger.info(f"Async worker consuming {settings.async_queue_name} "
+                f"(concurrency={settings.async_worker_concurrency})")
+
+    while not stopping.is_set():
+        # Only take a job off the queue when there is room to run it
+        await slots.acquire()
+        item = await queue.blpop([settings.async_queue_name], timeout=1)
+        if item is None:
+            slots.release()
+            continue
+        job_id = item[1].decode()
+        task = asyncio.create_task(process_job(job_id, llm_client))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        task.add_done_callback(lambda _: slots.release())
+
+    logger.info(f"Shutting down, waiting for {len(in_flight)} in-flight jobs")
+    if in_flight:
+        await asyncio.wait(in_flight)
+    await queue.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
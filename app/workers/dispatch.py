@@ -0,0 +1,33 @@
+"""
+Enqueue evaluation jobs for whichever worker mode is configured.
+"""
+from celery import group
+from app.config import settings
+from app.workers.celery_app import celery_app
+from app.utils.redis_client import get_redis
+
+
+def enqueue_evaluation(job_id: str) -> None:
+    """Hand a job to the Celery worker or, in async mode, to the async worker's Redis list."""
+    if settings.worker_mode == "async":
+        get_redis().rpush(settings.async_queue_name, job_id)
+        return
+    # send_task doesn't require importing the task
+    celery_app.send_task(
+        'app.workers.tasks.evaluate_job',
+        args=[job_id],
+        queue='celery'
+    )
+
+
+def enqueue_evaluations(job_ids: list[str]) -> None:
+    """Hand many jobs over at once: one RPUSH in async mode, one Celery group otherwise."""
+    if not job_ids:
+        return
+    if settings.worker_mode == "async":
+        get_redis().rpush(settings.async_queue_name, *job_ids)
+        return
+    group(
+        celery_app.signature('app.workers.tasks.evaluate_job', args=[job_id], queue='celery')
+        for job_id in job_ids
+    ).apply_async()
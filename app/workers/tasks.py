@@ -1,22 +1,55 @@
 ﻿from celery import shared_task
+from celery.signals import worker_ready, worker_process_shutdown
 from sqlalchemy.orm import Session
 from app.persistence.db import SessionLocal
 from app.persistence.repo import get_job, set_job_status
 from app.persistence.models import JobStatus
-from app.services.evaluation import run_evaluation
+from app.services.evaluation import run_evaluation, ensure_rag_initialized
+from app.rag.retrieve import vector_store_is_shared
+from app.config import settings
+from app.utils.metrics import start_metrics_server, mark_process_dead
+import os
 
+
+@worker_ready.connect
+def serve_metrics(**kwargs):
+    # Runs in the parent process; children report through PROMETHEUS_MULTIPROC_DIR
+    start_metrics_server(settings.worker_metrics_port)
+
+
+@worker_process_shutdown.connect
+def drop_child_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
+
+
+@worker_ready.connect
+def warm_up_rag(**kwargs):
+    # With a shared vector store, ingest once when the worker starts instead of
+    # on the first job; per-process stores are still filled lazily by each child
+    if vector_store_is_shared():
+        ensure_rag_initialized()
+
+
+# Retries are cheap: run_evaluation restores finished stages from their
+# checkpoints and only re-executes the stage that failed and those after it.
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
 def evaluate_job(self, job_id: str):
     db: Session = SessionLocal()
+    # Earlier attempts leave the job queued for the retry; only the last one marks it failed
+    final_attempt = self.request.retries >= self.max_retries
     try:
         job = get_job(db, job_id)
         if not job:
             return {"error": "job not found"}
-        set_job_status(db, job_id, JobStatus.processing)
-        result = run_evaluation(db, job)
+        if job.status == JobStatus.completed:
+            # Redelivered message for a job that already finished
+            return {"job_id": job_id, "status": "completed", "result": job.result_json}
+        # run_evaluation marks the job processing and records its outcome
+        result = run_evaluation(db, job, final_attempt=final_attempt)
         return {"job_id": job_id, "status": "completed", "result": result}
     except Exception as e:
-        set_job_status(db, job_id, JobStatus.failed)
+        if final_attempt:
+            set_job_status(db, job_id, JobStatus.failed)
         raise e
     finally:
         db.close()
\ No newline at end of file
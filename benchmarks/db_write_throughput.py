@@ -0,0 +1,111 @@
+"""
+Concurrent job-write throughput: default engine vs tuned engine.
+
+Each writer thread simulates evaluations the way the pipeline persists them
+(job insert, stage start/end rows, status and result updates, one commit
+each) while reader threads poll job status like the API does. Run against a
+scratch database:
+
+    python -m benchmarks.db_write_throughput --url sqlite:///./bench.db --writers 8 --jobs 50
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event
+import argparse
+import os
+import time
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import sessionmaker
+from app.persistence.db import Base, build_engine
+from app.persistence.models import File, FileKind, Job, JobStatus, Stage
+
+STAGES = ["parse_cv", "parse_report", "initialize_rag", "cache_lookup",
+          "evaluate_cv", "evaluate_project", "final_aggregation"]
+
+
+def _simulate_job(Session, file_id: str) -> None:
+    with Session() as db:
+        job = Job(job_title="Backend Engineer", cv_file_id=file_id, report_file_id=file_id)
+        db.add(job)
+        db.commit()
+        job.status = JobStatus.processing
+        db.commit()
+        for name in STAGES:
+            st = Stage(job_id=job.id, name=name)
+            db.add(st)
+            db.commit()
+            st.ended_at = datetime.utcnow()
+            st.output_json = {"value": name}
+            db.commit()
+        job.result_json = {"overall_score": 4.0}
+        job.status = JobStatus.completed
+        db.commit()
+
+
+def _poll(Session, stop: Event) -> int:
+    reads = 0
+    while not stop.is_set():
+        with Session() as db:
+            db.execute(select(Job.id, Job.status).where(Job.status == JobStatus.processing).limit(50)).all()
+        reads += 1
+    return reads
+
+
+def run(engine: Engine, writers: int, jobs: int, readers: int) -> dict:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, future=True)
+    with Session() as db:
+        f = File(kind=FileKind.cv, original_name="cv.pdf", path="/dev/null")
+        db.add(f)
+        db.commit()
+        file_id = f.id
+
+    stop = Event()
+    errors = 0
+    with ThreadPoolExecutor(max_workers=writers + readers) as pool:
+        polls = [pool.submit(_poll, Session, stop) for _ in range(readers)]
+        start = time.perf_counter()
+        futures = [pool.submit(_simulate_job, Session, file_id) for _ in range(writers * jobs)]
+        for fut in futures:
+            try:
+                fut.result()
+            except Exception:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        stop.set()
+        reads = sum(p.result() for p in polls)
+    return {
+        "jobs_per_s": round((writers * jobs - errors) / elapsed, 1),
+        "errors": errors,
+        "reads_per_s": round(reads / elapsed, 1),
+        "seconds": round(elapsed, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///./bench.db")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=25, help="jobs per writer")
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    url = make_url(args.url)
+    for label, engine in [
+        ("default", create_engine(args.url, future=True)),
+        ("tuned", build_engine(args.url)),
+    ]:
+        print(f"{label:8} {run(engine, args.writers, args.jobs, args.readers)}")
+        engine.dispose()
+        if url.get_backend_name() == "sqlite" and url.database:
+            # Start the next run from a fresh file (and journal mode)
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(url.database + suffix):
+                    os.remove(url.database + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Offline evaluation of the lexical pre-screen against stored LLM results.
+
+Scores the extracted CV text of every completed, LLM-evaluated job with the
+pre-screen and reports, per candidate threshold, how many jobs it would skip
+and how those skips agree with the LLM's verdicts, plus the rank correlation
+of the score with the LLM's CV match rate (and, as a baseline, of
+`keyword_overlap_score`). No LLM calls are made:
+
+    python -m benchmarks.prescreen_harness --url sqlite:///./app.db --thresholds 0.02 0.05 0.1
+"""
+from __future__ import annotations
+import argparse
+import numpy as np
+from sqlalchemy import select
+from app.config import settings
+from app.persistence.db import build_engine
+from app.persistence.models import FileText, Job, JobStatus
+from app.services.prescreen import JD_DIR, jd_index
+from app.services.scoring import keyword_overlap_score
+
+GOOD_FITS = {"strong fit", "moderate fit"}
+
+
+def load_jobs(url: str) -> tuple[list[str], list[str], list[dict]]:
+    """(CV texts, job titles, results) of completed jobs the LLM evaluated and whose CV text was extracted."""
+    query = (
+        select(FileText.text, Job.job_title, Job.result_json)
+        .join(FileText, FileText.file_id == Job.cv_file_id)
+        .where(Job.status == JobStatus.completed)
+    )
+    texts, titles, results = [], [], []
+    with build_engine(url).connect() as conn:
+        for text, title, result in conn.execution_options(yield_per=1000).execute(query):
+            if not result or "error" in result or (result.get("prescreen") or {}).get("rejected"):
+                continue
+            texts.append(text)
+            titles.append(title)
+            results.append(result)
+    return texts, titles, results
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return float("nan")
+    ranks_a, ranks_b = a.argsort().argsort(), b.argsort().argsort()
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def report(texts: list[str], titles: list[str], results: list[dict], thresholds: list[float]) -> None:
+    index = jd_index()
+    # Each CV is scored against the description for its own job's title, as the stage does
+    scores = np.zeros(len(texts))
+    for title in set(titles):
+        rows = [i for i, t in enumerate(titles) if t == title]
+        for start in range(0, len(rows), 500):
+            chunk = rows[start:start + 500]
+            scores[chunk] = index.scores([texts[i] for i in chunk], title)
+    match_rate = np.array([float(r.get("cv_match_rate") or 0) for r in results])
+    good_fit = np.array([r.get("recommendation") in GOOD_FITS for r in results])
+    jd_text = "\n".join(p.read_text(encoding="utf-8") for p in sorted(JD_DIR.glob("*.txt")))
+    overlap = np.array([keyword_overlap_score(t, jd_text) for t in texts])
+
+    print(f"jobs: {len(texts)} (good fit per LLM: {int(good_fit.sum())})")
+    print(f"score quantiles p10/p50/p90: {np.percentile(scores, [10, 50, 90]).round(3).tolist()}")
+    print(f"spearman vs cv_match_rate: prescreen {spearman(scores, match_rate):.3f}, "
+          f"keyword_overlap_score {spearman(overlap, match_rate):.3f}")
+    print(f"{'threshold':>9} {'skipped':>8} {'skip %':>7} {'LLM agrees':>10} {'good fits lost':>14} "
+          f"{'mean rate skipped':>17} {'mean rate kept':>14}")
+    for threshold in thresholds:
+        skipped = scores < threshold
+        n = int(skipped.sum())
+        lost = int((skipped & good_fit).sum())
+        print(f"{threshold:>9.3f} {n:>8} {100 * n / len(texts):>6.1f}% {n - lost:>10} {lost:>14} "
+              f"{match_rate[skipped].mean() if n else float('nan'):>17.2f} "
+              f"{match_rate[~skipped].mean() if n < len(texts) else float('nan'):>14.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=settings.database_url)
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=[0.02, 0.03, 0.05, 0.08, 0.1, settings.prescreen_threshold])
+    args = parser.parse_args()
+
+    texts, titles, results = load_jobs(args.url)
+    if not texts:
+        print("No completed jobs with extracted CV text found")
+        return
+    report(texts, titles, results, sorted(set(args.thresholds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Bulk rescoring throughput over synthetic completed jobs.
+
+Seeds a scratch database with completed jobs carrying random per-parameter
+scores, then times the scoring step alone (per-row Python vs NumPy) and a
+full `rescore_jobs` run (stream, score, bulk update):
+
+    python -m benchmarks.rescore_throughput --url sqlite:///./bench_rescore.db --jobs 100000
+"""
+from __future__ import annotations
+from datetime import datetime
+import argparse
+import os
+import random
+import time
+import uuid
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from app.config import settings
+from app.persistence.db import Base, build_engine
+from app.persistence.models import File, FileKind, Job, JobStatus
+from app.services.rescoring import rescore, rescore_jobs
+from app.services.scoring import RUBRIC_PARAMETERS, compute_final_scores, rubric_weights
+
+
+def _result(rng: random.Random) -> dict:
+    return {
+        "cv_match_rate": 0.0,
+        "project_score": 0.0,
+        "overall_score": 0.0,
+        "recommendation": "",
+        "overall_summary": "Synthetic",
+        "cv_details": {p: {"score": rng.randint(1, 5), "reasoning": "-"} for p in RUBRIC_PARAMETERS["cv"]},
+        "project_details": {p: {"score": rng.randint(1, 5), "reasoning": "-"} for p in RUBRIC_PARAMETERS["project"]},
+    }
+
+
+def seed(engine, jobs: int) -> list[dict]:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    file_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    results = [_result(rng) for _ in range(jobs)]
+    with engine.begin() as conn:
+        conn.execute(insert(File), [{"id": file_id, "kind": FileKind.cv, "original_name": "cv.pdf",
+                                     "path": "/dev/null", "created_at": now}])
+        for start in range(0, jobs, 10_000):
+            conn.execute(insert(Job), [
+                {"id": str(uuid.uuid4()), "job_title": "Backend Engineer", "cv_file_id": file_id,
+                 "report_file_id": file_id, "status": JobStatus.completed, "result_json": result,
+                 "created_at": now, "updated_at": now}
+                for result in results[start:start + 10_000]
+            ])
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///./bench_rescore.db")
+    parser.add_argument("--jobs", type=int, default=100_000)
+    args = parser.parse_args()
+
+    engine = build_engine(args.url)
+    results = seed(engine, args.jobs)
+    weights = rubric_weights()
+
+    start = time.perf_counter()
+    for r in results:
+        compute_final_scores(r["cv_details"], r["project_details"], settings.final_cv_weight)
+    print(f"score per row (python) {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    rescore(results, weights, settings.final_cv_weight)
+    print(f"score vectorized       {time.perf_counter() - start:.2f}s")
+
+    print(f"rescore_jobs dry run   {rescore_jobs(bind=engine, dry_run=True)}")
+    print(f"rescore_jobs           {rescore_jobs(bind=engine)}")
+    print(f"rescore_jobs again     {rescore_jobs(bind=engine)}")
+
+    engine.dispose()
+    url = make_url(args.url)
+    if url.get_backend_name() == "sqlite" and url.database:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(url.database + suffix):
+                os.remove(url.database + suffix)
+
+
+if __name__ == "__main__":
+    main()
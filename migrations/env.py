@@ -0,0 +1,37 @@
+"""
+Alembic environment. Uses the application's engine configuration so
+migrations run against DATABASE_URL with the same pragmas and pool settings.
+"""
+from logging.config import fileConfig
+from alembic import context
+from app.config import settings
+from app.persistence.db import Base, build_engine
+from app.persistence import models  # noqa: F401  (registers tables on Base.metadata)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(url=settings.database_url, target_metadata=target_metadata,
+                      literal_binds=True, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    engine = build_engine(settings.database_url)
+    with engine.connect() as connection:
+        # Batch mode lets ALTERs work on SQLite (copy-and-move)
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
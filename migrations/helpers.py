@@ -0,0 +1,43 @@
+"""
+Existence checks for migrations.
+
+Databases created by `init_db()` (create_all) already have some or all of
+the schema, so migrations only add what is missing and `alembic upgrade head`
+is safe on any of them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def has_column(table: str, column: str) -> bool:
+    return any(c["name"] == column for c in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def has_index(table: str, index: str) -> bool:
+    return any(i["name"] == index for i in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def add_column(table: str, column: sa.Column) -> None:
+    if not has_column(table, column.name):
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(column)
+
+
+def create_index(index: str, table: str, columns: list[str]) -> None:
+    if not has_index(table, index):
+        op.create_index(index, table, columns)
+
+
+def drop_index(index: str, table: str) -> None:
+    if has_index(table, index):
+        op.drop_index(index, table_name=table)
+
+
+def drop_column(table: str, column: str) -> None:
+    if has_column(table, column):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column(column)
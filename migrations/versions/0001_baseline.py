@@ -0,0 +1,57 @@
+"""Baseline schema: files, jobs, stages
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import has_table
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+file_kind = sa.Enum("cv", "report", name="filekind")
+job_status = sa.Enum("queued", "processing", "completed", "failed", name="jobstatus")
+
+
+def upgrade() -> None:
+    if not has_table("files"):
+        op.create_table(
+            "files",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("kind", file_kind, nullable=False),
+            sa.Column("original_name", sa.String(), nullable=False),
+            sa.Column("path", sa.String(), nullable=False),
+            sa.Column("uploaded_at", sa.DateTime(), nullable=False),
+        )
+    if not has_table("jobs"):
+        op.create_table(
+            "jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_title", sa.String(), nullable=False),
+            sa.Column("cv_file_id", sa.String(), sa.ForeignKey("files.id"), nullable=False),
+            sa.Column("report_file_id", sa.String(), sa.ForeignKey("files.id"), nullable=False),
+            sa.Column("status", job_status, nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("result_json", sa.JSON(), nullable=True),
+        )
+    if not has_table("stages"):
+        op.create_table(
+            "stages",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id"), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("started_at", sa.DateTime(), nullable=False),
+            sa.Column("ended_at", sa.DateTime(), nullable=True),
+            sa.Column("logs", sa.Text(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("stages")
+    op.drop_table("jobs")
+    op.drop_table("files")
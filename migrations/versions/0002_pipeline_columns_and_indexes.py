@@ -0,0 +1,73 @@
+"""Pipeline columns, file texts, batches and job indexes
+
+Adds what the evaluation pipeline gained since the baseline (stage
+checkpoints and cache hits, result cache keys, content hashes, extracted
+texts, batches) and indexes on the columns the API and workers filter by.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import add_column, create_index, drop_column, drop_index, has_table
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_jobs_status", "jobs", ["status"]),
+    ("ix_jobs_created_at", "jobs", ["created_at"]),
+    ("ix_stages_job_id", "stages", ["job_id"]),
+    ("ix_files_kind", "files", ["kind"]),
+    ("ix_files_sha256", "files", ["sha256"]),
+    ("ix_jobs_cache_key", "jobs", ["cache_key"]),
+    ("ix_jobs_batch_id", "jobs", ["batch_id"]),
+]
+
+
+def upgrade() -> None:
+    if not has_table("batches"):
+        op.create_table(
+            "batches",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_title", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+    if not has_table("file_texts"):
+        op.create_table(
+            "file_texts",
+            sa.Column("file_id", sa.String(), sa.ForeignKey("files.id"), primary_key=True),
+            sa.Column("text", sa.Text(), nullable=False),
+            sa.Column("page_count", sa.Integer(), nullable=False),
+            sa.Column("truncated", sa.Boolean(), nullable=False, server_default=sa.false()),
+            sa.Column("extraction_ms", sa.Float(), nullable=False),
+            sa.Column("extracted_at", sa.DateTime(), nullable=False),
+        )
+    add_column("file_texts", sa.Column("truncated", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    add_column("files", sa.Column("sha256", sa.String(64), nullable=True))
+    add_column("jobs", sa.Column("cache_key", sa.String(), nullable=True))
+    add_column("jobs", sa.Column("force_refresh", sa.Boolean(), nullable=False, server_default=sa.false()))
+    add_column("jobs", sa.Column("batch_id", sa.String(), sa.ForeignKey("batches.id", name="fk_jobs_batch_id"),
+                                 nullable=True))
+    add_column("stages", sa.Column("output_json", sa.JSON(), nullable=True))
+    add_column("stages", sa.Column("cache_hit", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    for name, table, columns in INDEXES:
+        create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        drop_index(name, table)
+    drop_column("stages", "cache_hit")
+    drop_column("stages", "output_json")
+    drop_column("jobs", "batch_id")
+    drop_column("jobs", "force_refresh")
+    drop_column("jobs", "cache_key")
+    drop_column("files", "sha256")
+    op.drop_table("file_texts")
+    op.drop_table("batches")
@@ -0,0 +1,21 @@
+"""Per-stage LLM usage records
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+import sqlalchemy as sa
+from migrations.helpers import add_column, drop_column
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column("stages", sa.Column("usage_json", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    drop_column("stages", "usage_json")
@@ -0,0 +1,21 @@
+"""Model cascade tier on stages
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+import sqlalchemy as sa
+from migrations.helpers import add_column, drop_column
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    add_column("stages", sa.Column("model_tier", sa.String(16), nullable=True))
+
+
+def downgrade() -> None:
+    drop_column("stages", "model_tier")
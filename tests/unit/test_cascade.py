@@ -0,0 +1,81 @@
+import asyncio
+from app.config import settings
+from app.llm.cascade import FAST, STRONG, cascade, cascade_async, escalation_reason
+from app.services.scoring import RUBRIC_PARAMETERS
+
+
+def _result(score) -> dict:
+    return {key: {"score": score} for key in RUBRIC_PARAMETERS["cv"]}
+
+
+class StubClient:
+    """LLMClient stand-in: only the model name matters to the cascade."""
+
+    def __init__(self, model: str, temperature: float = 0.0) -> None:
+        self.model = model
+        self.temperature = temperature
+
+
+def _evaluate(answers: dict, calls: list[str]):
+    def evaluate(client: StubClient) -> dict:
+        calls.append(client.model)
+        answer = answers[client.model]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+    return evaluate
+
+
+def test_escalation_reason():
+    assert escalation_reason(_result(5), "cv") is None
+    assert escalation_reason(_result(1), "cv") is None
+    assert escalation_reason(_result(3), "cv") == "borderline score 3.00"
+    assert escalation_reason(_result(6), "cv").startswith("invalid score")
+    assert escalation_reason(_result(0), "cv").startswith("invalid score")
+    assert escalation_reason(_result("4"), "cv").startswith("invalid score")
+    assert escalation_reason(_result(True), "cv").startswith("invalid score")
+    assert escalation_reason({"technical_skills": {"score": 5}}, "cv").startswith("invalid score")
+
+
+def test_borderline_band_is_inclusive():
+    # 4 * 0.4 + 1 * 0.6 = 2.2, just below the band
+    result = _result(1)
+    result["technical_skills"]["score"] = 4
+    assert escalation_reason(result, "cv") is None
+    for score in (settings.cascade_borderline_min, settings.cascade_borderline_max):
+        assert escalation_reason(_result(score), "cv") is not None
+
+
+def test_clear_fast_answer_is_kept():
+    calls = []
+    tiered = cascade(_evaluate({settings.cascade_fast_model: _result(5)}, calls), "cv", StubClient("strong"))
+    assert tiered.tier == FAST and tiered.value == _result(5)
+    assert calls == [settings.cascade_fast_model]
+
+
+def test_borderline_and_invalid_answers_escalate():
+    for fast_answer in (_result(3), _result(7), {}):
+        calls = []
+        answers = {settings.cascade_fast_model: fast_answer, "strong": _result(4)}
+        tiered = cascade(_evaluate(answers, calls), "cv", StubClient("strong"))
+        assert tiered.tier == STRONG and tiered.value == _result(4) and tiered.note
+        assert calls == [settings.cascade_fast_model, "strong"]
+
+
+def test_fast_model_failure_escalates():
+    calls = []
+    answers = {settings.cascade_fast_model: ValueError("bad JSON"), "strong": _result(2)}
+    tiered = cascade(_evaluate(answers, calls), "cv", StubClient("strong"))
+    assert tiered.tier == STRONG and tiered.note == "fast model failed: bad JSON"
+
+
+def test_async_cascade_escalates_borderline():
+    calls = []
+    sync_evaluate = _evaluate({settings.cascade_fast_model: _result(3), "strong": _result(5)}, calls)
+
+    async def evaluate(client: StubClient) -> dict:
+        return sync_evaluate(client)
+
+    tiered = asyncio.run(cascade_async(evaluate, "cv", StubClient("strong")))
+    assert tiered.tier == STRONG and tiered.value == _result(5)
+    assert calls == [settings.cascade_fast_model, "strong"]
@@ -0,0 +1,40 @@
+from app.rag.embedding_cache import EmbeddingCache
+
+MODEL = "test-embedding"
+
+
+def test_round_trip_by_position(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    cache.put_many(MODEL, {"alpha": [0.5, 1.0], "beta": [2.0, -1.0]})
+    assert cache.get_many(MODEL, ["beta", "missing", "alpha"]) == {0: [2.0, -1.0], 2: [0.5, 1.0]}
+    assert cache.get("other-model", "alpha") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put(MODEL, "old", [1.0])
+    cache.put(MODEL, "kept", [2.0])
+    assert cache.get(MODEL, "old") == [1.0]
+    cache.put(MODEL, "new", [3.0])
+    # "kept" was written after "old" but "old" was read since
+    assert cache.get(MODEL, "kept") is None
+    assert cache.get(MODEL, "old") == [1.0] and cache.get(MODEL, "new") == [3.0]
+
+
+def test_unusable_database_is_a_miss(tmp_path):
+    # A directory where the database file should be: every connect fails
+    path = tmp_path / "cache.sqlite3"
+    path.mkdir()
+    cache = EmbeddingCache(str(path), max_entries=100)
+    cache.put(MODEL, "alpha", [1.0])
+    assert cache.get_many(MODEL, ["alpha", "beta"]) == {}
+    assert cache.stats()["misses"] == 2
+
+
+def test_corrupt_database_is_a_miss(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    path.write_bytes(b"not a sqlite database" * 100)
+    cache = EmbeddingCache(str(path), max_entries=100)
+    cache.put(MODEL, "alpha", [1.0])
+    assert cache.get(MODEL, "alpha") is None
@@ -0,0 +1,37 @@
+import fakeredis
+import pytest
+from app.config import settings
+from app.persistence.db import Base, build_engine
+from app.persistence.models import Job, JobStatus
+from app.services.evaluation import run_evaluation
+from app.utils import events
+from sqlalchemy.orm import Session
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # No API key: run_evaluation fails before any stage runs
+    monkeypatch.setattr(settings, "openai_api_key", "")
+    monkeypatch.setattr(events, "get_redis", lambda: fakeredis.FakeRedis())
+    engine = build_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Job(id="job", job_title="Backend Engineer", cv_file_id="cv", report_file_id="report"))
+        session.commit()
+        yield session
+
+
+def test_failed_attempt_before_the_last_requeues_the_job(db):
+    with pytest.raises(Exception):
+        run_evaluation(db, db.get(Job, "job"), final_attempt=False)
+    job = db.get(Job, "job")
+    db.refresh(job)
+    assert job.status == JobStatus.queued and job.result_json is None
+
+
+def test_last_attempt_marks_the_job_failed(db):
+    with pytest.raises(Exception):
+        run_evaluation(db, db.get(Job, "job"))
+    job = db.get(Job, "job")
+    db.refresh(job)
+    assert job.status == JobStatus.failed and "error" in job.result_json
@@ -0,0 +1,72 @@
+import pytest
+from qdrant_client import QdrantClient
+from app.rag import ingest
+from app.rag.ingest import MANIFEST_COLLECTION, create_collection, load_manifest, sync_collection
+
+COLLECTION = "docs"
+
+
+def _text(*paragraphs: str) -> str:
+    # Paragraphs long enough to become one chunk each
+    return "\n\n".join(f"{p} " * 100 for p in paragraphs)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ingest, "get_embeddings", lambda chunks: [[1.0] * 1536 for _ in chunks])
+    client = QdrantClient(":memory:")
+    create_collection(client, MANIFEST_COLLECTION, vector_size=1)
+    return client
+
+
+def _point_count(client: QdrantClient) -> int:
+    return client.count(COLLECTION).count
+
+
+def test_unchanged_files_are_skipped(client, tmp_path, monkeypatch):
+    doc = tmp_path / "doc.txt"
+    doc.write_text(_text("alpha", "beta"), encoding="utf-8")
+    assert sync_collection(client, COLLECTION, [doc])
+    assert _point_count(client) == 2
+
+    def fail(*_, **__):
+        raise AssertionError("unchanged file ingested again")
+    monkeypatch.setattr(ingest, "ingest_document", fail)
+    assert not sync_collection(client, COLLECTION, [doc])
+
+
+def test_changed_file_replaces_its_chunks(client, tmp_path):
+    doc = tmp_path / "doc.txt"
+    doc.write_text(_text("alpha", "beta", "gamma"), encoding="utf-8")
+    sync_collection(client, COLLECTION, [doc])
+    doc.write_text(_text("delta"), encoding="utf-8")
+    assert sync_collection(client, COLLECTION, [doc])
+    assert _point_count(client) == 1
+    (entry,) = load_manifest(client, COLLECTION).values()
+    assert entry["sha256"] == ingest.file_sha256(doc) and len(entry["chunk_ids"]) == 1
+
+
+def test_removed_file_is_deleted(client, tmp_path):
+    kept, removed = tmp_path / "kept.txt", tmp_path / "removed.txt"
+    kept.write_text(_text("alpha"), encoding="utf-8")
+    removed.write_text(_text("beta", "gamma"), encoding="utf-8")
+    sync_collection(client, COLLECTION, [kept, removed])
+    assert sync_collection(client, COLLECTION, [kept])
+    assert _point_count(client) == 1
+    assert list(load_manifest(client, COLLECTION)) == [kept.as_posix()]
+
+
+def test_partially_embedded_file_is_retried(client, tmp_path, monkeypatch):
+    doc = tmp_path / "doc.txt"
+    doc.write_text(_text("alpha", "beta"), encoding="utf-8")
+    monkeypatch.setattr(ingest, "get_embeddings", lambda chunks: [[1.0] * 1536] + [None] * (len(chunks) - 1))
+    assert sync_collection(client, COLLECTION, [doc])
+    (entry,) = load_manifest(client, COLLECTION).values()
+    # No hash recorded, so the next sync ingests the file again
+    assert entry["sha256"] is None and len(entry["chunk_ids"]) == 1
+
+    monkeypatch.setattr(ingest, "get_embeddings", lambda chunks: [[1.0] * 1536 for _ in chunks])
+    assert sync_collection(client, COLLECTION, [doc])
+    (entry,) = load_manifest(client, COLLECTION).values()
+    assert entry["sha256"] == ingest.file_sha256(doc) and len(entry["chunk_ids"]) == 2
+    assert _point_count(client) == 2
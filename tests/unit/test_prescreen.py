@@ -0,0 +1,49 @@
+import pytest
+from app.services import prescreen as ps
+from app.services.prescreen import jd_index, prescreen, rejection_result
+
+BACKEND_CV = "Backend engineer building Python APIs with FastAPI, PostgreSQL, Redis queues and Docker deployments."
+DESIGNER_CV = "Product designer running user research, Figma prototypes, wireframes and usability testing."
+
+
+@pytest.fixture(autouse=True)
+def job_descriptions(tmp_path, monkeypatch):
+    (tmp_path / "backend_engineer.txt").write_text(
+        "Job Description - Backend Engineer\n\n"
+        "Build Python APIs with FastAPI and PostgreSQL, run Redis queues and ship Docker deployments.\n",
+        encoding="utf-8")
+    (tmp_path / "product_designer.txt").write_text(
+        "Job Description - Product Designer\n\n"
+        "Lead user research, build Figma prototypes and wireframes, and run usability testing.\n",
+        encoding="utf-8")
+    monkeypatch.setattr(ps, "JD_DIR", tmp_path)
+
+
+def test_description_selected_by_job_title():
+    index = jd_index()
+    assert index.names[index.select("Senior Backend Engineer")] == "backend_engineer"
+    assert index.names[index.select("product designer")] == "product_designer"
+    assert index.select("Chef") is None
+
+
+def test_cv_scored_against_the_jobs_own_description():
+    screen = prescreen(DESIGNER_CV, "Backend Engineer", threshold=0.05)
+    assert screen["rejected"] and screen["job_description"] == "backend_engineer"
+    screen = prescreen(DESIGNER_CV, "Product Designer", threshold=0.05)
+    assert not screen["rejected"] and screen["score"] > 0.05
+    assert not prescreen(BACKEND_CV, "Backend Engineer", threshold=0.05)["rejected"]
+
+
+def test_unmatched_title_falls_back_to_best_description():
+    screen = prescreen(DESIGNER_CV, "Chef", threshold=0.05)
+    assert screen["job_description"] is None and not screen["rejected"]
+    assert screen["score"] == prescreen(DESIGNER_CV, "Product Designer", threshold=0.05)["score"]
+
+
+def test_rejection_result_is_templated():
+    screen = {"score": 0.01, "threshold": 0.05, "rejected": True, "job_description": "backend_engineer"}
+    result = rejection_result(screen)
+    assert result["recommendation"] == "not recommended"
+    assert result["overall_score"] == 1.0 and result["project_score"] is None
+    assert "0.010" in result["cv_feedback"] and "0.050" in result["cv_feedback"]
+    assert result["overall_summary"] == result["cv_feedback"]
@@ -0,0 +1,82 @@
+import fakeredis
+import pytest
+from app.config import settings
+from app.llm import rate_limit
+from app.llm.rate_limit import RateLimiter
+
+MODEL = "test-model"
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    # Buckets of 2 requests and 100 tokens, refilled at 2/60 requests and 100/60 tokens per second
+    monkeypatch.setattr(settings, "openai_rate_limits", {MODEL: {"rpm": 2, "tpm": 100}})
+
+
+def _age_buckets(client: fakeredis.FakeRedis, seconds: float) -> None:
+    """Move the buckets' last refill back in time, as if `seconds` had passed."""
+    for bucket in ("rpm", "tpm"):
+        key = f"ratelimit:{MODEL}:{bucket}"
+        client.hset(key, "ts", float(client.hget(key, "ts")) - seconds)
+
+
+def test_burst_up_to_capacity_then_wait():
+    limiter = RateLimiter(fakeredis.FakeRedis())
+    assert limiter.try_acquire(MODEL, 10) == 0
+    assert limiter.try_acquire(MODEL, 10) == 0
+    # Out of requests: one refills in 30s
+    assert limiter.try_acquire(MODEL, 10) == pytest.approx(30, abs=0.5)
+
+
+def test_token_bucket_limits_large_calls():
+    limiter = RateLimiter(fakeredis.FakeRedis())
+    assert limiter.try_acquire(MODEL, 80) == 0
+    # 20 tokens left, 50 more take 30s at 100 tokens/min
+    assert limiter.try_acquire(MODEL, 70) == pytest.approx(30, abs=0.5)
+    # A refused call is not debited
+    assert limiter.try_acquire(MODEL, 20) == 0
+
+
+def test_buckets_refill_over_time():
+    client = fakeredis.FakeRedis()
+    limiter = RateLimiter(client)
+    limiter.try_acquire(MODEL, 10)
+    limiter.try_acquire(MODEL, 10)
+    assert limiter.try_acquire(MODEL, 10) > 0
+    _age_buckets(client, 30)
+    assert limiter.try_acquire(MODEL, 10) == 0
+    assert limiter.try_acquire(MODEL, 10) > 0
+
+
+def test_buckets_are_shared_between_clients():
+    server = fakeredis.FakeServer()
+    first = RateLimiter(fakeredis.FakeRedis(server=server))
+    second = RateLimiter(fakeredis.FakeRedis(server=server))
+    assert first.try_acquire(MODEL, 10) == 0
+    assert second.try_acquire(MODEL, 10) == 0
+    assert first.try_acquire(MODEL, 10) > 0
+    assert second.try_acquire(MODEL, 10) > 0
+
+
+def test_acquire_sleeps_until_capacity(monkeypatch):
+    client = fakeredis.FakeRedis()
+    limiter = RateLimiter(client)
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        _age_buckets(client, seconds)
+
+    monkeypatch.setattr(rate_limit.time, "sleep", sleep)
+    for _ in range(3):
+        limiter.acquire(MODEL, 10)
+    assert len(slept) == 1 and 30 <= slept[0] <= 34
+
+
+def test_acquire_gives_up_past_max_wait(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_max_wait_seconds", 5.0)
+    limiter = RateLimiter(fakeredis.FakeRedis())
+    limiter.acquire(MODEL, 10)
+    limiter.acquire(MODEL, 10)
+    with pytest.raises(TimeoutError):
+        limiter.acquire(MODEL, 10)
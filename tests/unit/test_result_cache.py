@@ -0,0 +1,22 @@
+from app.config import settings
+from app.services.result_cache import evaluation_cache_key
+
+
+def _key() -> str:
+    return evaluation_cache_key("cv-sha", "report-sha", "Backend Engineer", corpus_version=1)
+
+
+def test_key_ignores_title_spacing_and_case():
+    assert _key() == evaluation_cache_key("cv-sha", "report-sha", "  backend   ENGINEER ", corpus_version=1)
+
+
+def test_key_changes_with_model_and_cascade(monkeypatch):
+    base = _key()
+    monkeypatch.setattr(settings, "openai_model", "another-model")
+    changed_model = _key()
+    assert changed_model != base
+    monkeypatch.setattr(settings, "cascade_enabled", True)
+    cascading = _key()
+    assert cascading != changed_model
+    monkeypatch.setattr(settings, "cascade_borderline_max", settings.cascade_borderline_max + 0.5)
+    assert _key() != cascading
@@ -0,0 +1,81 @@
+import asyncio
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.routers import result as result_router
+from app.persistence.db import Base, build_async_engine, build_engine, get_async_db
+from app.persistence.models import Job, JobStatus
+from app.services import response_cache
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+RESULT = {"overall_score": 4.2, "overall_summary": "Strong backend candidate."}
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    # One client per event loop: TestClient and asyncio.run each run their own
+    monkeypatch.setattr(response_cache, "get_async_redis", lambda: fakeredis.FakeAsyncRedis(server=server))
+    return server
+
+
+@pytest.fixture
+def client(tmp_path, redis_server):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = build_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(Job(id="done", job_title="Backend Engineer", cv_file_id="cv", report_file_id="report",
+                   status=JobStatus.completed, result_json=RESULT))
+        db.add(Job(id="queued", job_title="Backend Engineer", cv_file_id="cv", report_file_id="report"))
+        db.commit()
+    sessions = async_sessionmaker(build_async_engine(url), expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(result_router.router)
+    app.dependency_overrides[get_async_db] = get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_etag_and_not_modified(client, redis_server):
+    first = client.get("/result/done")
+    assert first.status_code == 200 and first.json()["result"] == RESULT
+    etag = first.headers["etag"]
+    # The completed response is now cached and still revalidates against the same ETag
+    assert fakeredis.FakeRedis(server=redis_server).exists("result:done")
+    assert client.get("/result/done", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/result/done", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_status_projection(client, redis_server):
+    response = client.get("/result/queued", params={"fields": "status"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"id", "status", "updated_at"} and response.json()["status"] == "queued"
+    etag = response.headers["etag"]
+    assert etag.endswith('-status"') and etag != client.get("/result/queued").headers["etag"]
+    not_modified = client.get("/result/queued", params={"fields": "status"}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    # Jobs still running are never cached
+    assert not fakeredis.FakeRedis(server=redis_server).exists("result:queued")
+
+
+def test_invalidation_during_read_is_not_cached_over(redis_server):
+    async def scenario():
+        _, version = await response_cache.get_result_response_async("job")
+        # A rescoring commits and invalidates after the reader loaded the old row
+        await response_cache.invalidate_result_response_async("job")
+        await response_cache.cache_result_response_async("job", {"stale": True}, '"old"', version)
+        assert (await response_cache.get_result_response_async("job"))[0] is None
+
+        _, version = await response_cache.get_result_response_async("job")
+        await response_cache.cache_result_response_async("job", {"fresh": True}, '"new"', version)
+        assert (await response_cache.get_result_response_async("job"))[0] == ({"fresh": True}, '"new"')
+
+    asyncio.run(scenario())
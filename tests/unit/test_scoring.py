@@ -0,0 +1,51 @@
+from app.services.scoring import (
+    RUBRIC_PARAMETERS, compute_final_scores, parse_rubric_weights, recommendation_for, rubric_weights,
+)
+
+
+def test_rubric_weights_parsed_from_system_docs():
+    weights = rubric_weights()
+    assert weights["cv"] == {"technical_skills": 0.4, "experience_level": 0.25,
+                             "achievements": 0.2, "cultural_fit": 0.15}
+    assert abs(sum(weights["project"].values()) - 1) < 1e-9
+    assert weights["project"]["correctness"] == 0.3
+
+
+def test_parse_rubric_weights_normalizes():
+    text = "Parameter: Technical Skills Match (Weight: 80%)\nParameter: Experience Level (Weight: 20%)\n" \
+           "Parameter: Relevant Achievements (Weight: 50%)\nParameter: Cultural / Fit (Weight: 50%)\n"
+    weights = parse_rubric_weights(text, RUBRIC_PARAMETERS["cv"])
+    assert weights["technical_skills"] == 0.4 and weights["cultural_fit"] == 0.25
+
+
+def test_final_scores_are_weighted_and_banded():
+    cv = {key: {"score": 4} for key in RUBRIC_PARAMETERS["cv"]}
+    project = {key: {"score": 3} for key in RUBRIC_PARAMETERS["project"]}
+    scores = compute_final_scores(cv, project, cv_weight=0.3)
+    assert scores["overall_score"] == 3.3
+    assert scores["recommendation"] == "moderate fit"
+    assert recommendation_for(4.0) == "strong fit" and recommendation_for(1.2) == "not recommended"
+
+
+def test_incomplete_parameters_fall_back_to_model_aggregate():
+    scores = compute_final_scores({"cv_match_rate": 0.5}, {"project_score": 2}, cv_weight=0.3)
+    assert scores["cv_weighted_score"] == 2.5
+    assert scores["overall_score"] == 2.15
+
+
+def test_vectorized_rescore_matches_per_row_scoring():
+    import random
+    from app.services.rescoring import rescore
+    rng = random.Random(1)
+    results = [
+        {"cv_details": {k: {"score": rng.randint(1, 5)} for k in RUBRIC_PARAMETERS["cv"]},
+         "project_details": {k: {"score": rng.randint(1, 5)} for k in RUBRIC_PARAMETERS["project"]}}
+        for _ in range(200)
+    ]
+    results.append({"cv_match_rate": 0.5, "project_score": 2, "cv_details": {}, "project_details": {}})
+    scores = rescore(results, rubric_weights(), cv_weight=0.3)
+    for i, r in enumerate(results):
+        expected = compute_final_scores({"cv_match_rate": r.get("cv_match_rate"), **r["cv_details"]},
+                                        {"project_score": r.get("project_score"), **r["project_details"]}, 0.3)
+        assert abs(scores["overall_score"][i] - expected["overall_score"]) < 0.011
+        assert scores["recommendation"][i] == expected["recommendation"]
@@ -0,0 +1,60 @@
+import asyncio
+import time
+import fakeredis
+import pytest
+from app.persistence.db import Base, build_async_engine, build_engine
+from app.persistence.models import Job, JobStatus
+from app.services import response_cache, summary
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+RESULT = {"overall_score": 3.3, "recommendation": "moderate fit", "overall_summary": None}
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    engine = build_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add(Job(id="job", job_title="Backend Engineer", cv_file_id="cv", report_file_id="report",
+                   status=JobStatus.completed, result_json=RESULT))
+        db.commit()
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(summary, "get_async_redis", lambda: fakeredis.FakeAsyncRedis(server=server))
+    monkeypatch.setattr(response_cache, "get_async_redis", lambda: fakeredis.FakeAsyncRedis(server=server))
+    monkeypatch.setattr(summary, "AsyncSessionLocal", async_sessionmaker(build_async_engine(url),
+                                                                         expire_on_commit=False))
+    monkeypatch.setattr(summary, "AsyncLLMClient", lambda: None)
+    return engine
+
+
+def _stored(engine) -> dict:
+    with Session(engine) as db:
+        return db.get(Job, "job").result_json
+
+
+def test_summary_is_stored(engine, monkeypatch):
+    async def write(*_):
+        return "Solid candidate."
+    monkeypatch.setattr(summary, "write_summary_async", write)
+    assert asyncio.run(summary.ensure_summary("job")) == "Solid candidate."
+    assert _stored(engine) == {**RESULT, "overall_summary": "Solid candidate."}
+
+
+def test_rescore_during_the_llm_call_is_not_overwritten(engine, monkeypatch):
+    rescored = {**RESULT, "overall_score": 4.1, "recommendation": "strong fit"}
+
+    async def write(*_):
+        # A rescore commits while the summary is being written
+        time.sleep(0.01)
+        with Session(engine) as db:
+            db.execute(update(Job).where(Job.id == "job").values(result_json=rescored))
+            db.commit()
+        return "Summary of the old scores."
+    monkeypatch.setattr(summary, "write_summary_async", write)
+    assert asyncio.run(summary.ensure_summary("job")) is None
+    assert _stored(engine) == rescored
+    # The marker was released, so the next read writes a summary of the new scores
+    assert asyncio.run(summary.claim_summary("job"))
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import io
+import pytest
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from app.api.routers import upload
+from app.config import settings
+from app.persistence.db import Base, build_async_engine, build_engine, get_async_db
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path / "uploads"))
+    monkeypatch.setattr(settings, "max_upload_bytes", 1000)
+    return tmp_path / "uploads"
+
+
+@pytest.fixture
+def client(tmp_path, upload_dir, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    Base.metadata.create_all(bind=build_engine(url))
+    sessions = async_sessionmaker(build_async_engine(url), expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    async def no_extraction(*_):
+        pass
+    monkeypatch.setattr(upload, "extract_and_store", no_extraction)
+    app = FastAPI()
+    app.include_router(upload.router)
+    app.dependency_overrides[get_async_db] = get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _post(client: TestClient, cv: bytes, report: bytes):
+    return client.post("/upload", files={"cv": ("cv.pdf", cv, "application/pdf"),
+                                         "report": ("report.pdf", report, "application/pdf")})
+
+
+def test_identical_uploads_share_file_rows_and_storage(client, upload_dir):
+    first = _post(client, b"cv bytes", b"report bytes").json()
+    second = _post(client, b"cv bytes", b"report bytes").json()
+    assert first == second and first["cv_id"] != first["report_id"]
+    stored = [p for p in upload_dir.rglob("*") if p.is_file()]
+    assert sorted(p.suffix for p in stored) == [".pdf", ".pdf"]
+    assert not any(p.name.endswith(".part") for p in stored)
+
+
+def test_declared_size_over_the_limit_is_rejected(client):
+    assert _post(client, b"x" * 1001, b"report").status_code == 413
+
+
+def test_limit_is_enforced_while_streaming(upload_dir, monkeypatch):
+    monkeypatch.setattr(upload, "CHUNK_SIZE", 300)
+    # No declared size: the limit is only hit after a few chunks were written
+    f = UploadFile(io.BytesIO(b"x" * 1001), filename="big.pdf")
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(upload._save_upload(f))
+    assert exc.value.status_code == 413
+    # The partial file is removed
+    assert not [p for p in upload_dir.rglob("*") if p.is_file()]
+
+
+def test_stored_under_content_hash(upload_dir):
+    path, sha = asyncio.run(upload._save_upload(UploadFile(io.BytesIO(b"content"), filename="CV.PDF")))
+    assert sha == hashlib.sha256(b"content").hexdigest()
+    assert path == str(upload_dir / sha[:2] / f"{sha}.pdf")